@@ -1,12 +1,13 @@
 import asyncio
 import os
 import sys
-import subprocess
-import signal
+import threading
+import time
+from collections import OrderedDict
 import gradio as gr
 from azure.identity import DefaultAzureCredential, get_bearer_token_provider
 from openai import AsyncAzureOpenAI
-from agents.mcp import MCPServerStdio
+from agents.mcp import MCPServerStdio, MCPServerStreamableHttp
 from agents import (
     Agent,
     Runner,
@@ -18,6 +19,19 @@ from agents import (
 
 # MCP Server configuration
 MCP_SERVER_FILE = "./MCPServer_HomeAutomation.py"
+# URL of a shared server started with --transport streamable-http (OPTIONAL)
+MCP_SERVER_URL = os.getenv("MCP_SERVER_URL")
+# Seconds to wait for the server to complete the MCP initialize handshake
+MCP_SERVER_START_TIMEOUT = float(os.getenv("MCP_SERVER_START_TIMEOUT", "30"))
+# Initialised servers kept warm from app launch, so starting one is just a checkout (0 disables the pool)
+MCP_SERVER_POOL_SIZE = int(os.getenv("MCP_SERVER_POOL_SIZE", "1"))
+
+# Per-user chat sessions: at most this many, least recently used evicted first
+CLIENT_MAX_SESSIONS = int(os.getenv("CLIENT_MAX_SESSIONS", "200"))
+# Seconds of inactivity after which a session (and its MCP connection) is closed
+CLIENT_SESSION_TIMEOUT = float(os.getenv("CLIENT_SESSION_TIMEOUT", "1800"))
+# Requests per event (e.g. chats) that Gradio runs at the same time
+CLIENT_CONCURRENCY_LIMIT = int(os.getenv("CLIENT_CONCURRENCY_LIMIT", "100"))
 
 # Set up environment variables for Azure OpenAI
 AOAI_API_BASE = os.getenv("AZURE_OPENAI_API_BASE")
@@ -27,21 +41,23 @@ AOAI_DEPLOYMENT = os.getenv("AZURE_OPENAI_API_DEPLOY")
 # Disable debug tracing (OPTIONAL)
 set_tracing_disabled(True)
 
-# Global variables to manage session state
-agent = None
-mcp_server = None
-server_process = None
-current_thread_id = None
-previous_result = None
+# State shared by all users: the Azure OpenAI client and the warm MCP server pool
 aoai_client = None
+server_pool = []
+pool_warming = set()
+server_slots = set()  # Slots of the running stdio servers, each with its own snapshot and journal
+
+# Per-user state, keyed by Gradio session, least recently used first
+sessions = OrderedDict()
 
-# Create event loop for Gradio app
+# Event loop for the agents and their MCP connections, running in its own thread: every Gradio
+# request awaits its work here, and the MCP servers outlive Gradio's loop for a clean shutdown
 event_loop = asyncio.new_event_loop()
-asyncio.set_event_loop(event_loop)
+threading.Thread(target=event_loop.run_forever, name="agent-loop", daemon=True).start()
 
 async def create_agent(mcp_servers=None):
-    """Create or update the AI agent with optional MCP servers"""
-    global agent, aoai_client
+    """Create an AI agent with optional MCP servers"""
+    global aoai_client
     
     # Initialise Azure OpenAI client if not already done
     if aoai_client is None:
@@ -63,7 +79,7 @@ async def create_agent(mcp_servers=None):
         instructions = "You are a helpful AI agent. You currently don't have access to any tools or external systems. Explain to users that they need to start the MCP server to access home automation capabilities."
     
     # Create agent with dynamic MCP servers
-    agent = Agent(
+    return Agent(
         name = "Home Assistant",
         instructions = instructions,
         model = OpenAIChatCompletionsModel(
@@ -73,160 +89,416 @@ async def create_agent(mcp_servers=None):
         mcp_servers = mcp_servers or [],
     )
 
-async def initialise_llm():
-    """Initialise the LLM agent without MCP server"""
+async def initialise_llm(session):
+    """Initialise the session's LLM agent without MCP server, warming the MCP server pool meanwhile"""
     try:
-        await create_agent()
-        return "✅ AI Agent initialised successfully! (No MCP tools available yet)"
+        # Normally already warming since launch; this covers a pool emptied by a shutdown
+        fill_server_pool()
+        session.agent, *_ = await asyncio.gather(create_agent(), *pool_warming)
+        return f"✅ AI Agent initialised successfully! (No MCP tools available yet, {len(server_pool)} MCP server(s) warm)"
     except Exception as e:
         return f"❌ Error initialising LLM: {str(e)}"
 
-async def start_mcp_server():
-    """Start the MCP server process and update agent"""
-    global mcp_server, server_process
-    
+async def supervise_mcp_server(server, ready, stop, slot=None):
+    """Own an MCP server connection for its whole life, so one task opens and closes it.
+    For stdio this is the server process: spawned on entry, shut down on exit"""
     try:
-        # Check if server file exists
-        if not os.path.exists(MCP_SERVER_FILE):
-            return f"❌ MCP server file not found: {MCP_SERVER_FILE}"
-        
-        # Start the MCP server process
-        server_process = subprocess.Popen(
-            [sys.executable, MCP_SERVER_FILE],
-            stdin = subprocess.PIPE,
-            stdout = subprocess.PIPE,
-            stderr = subprocess.PIPE,
-            text = True,
-            bufsize = 0
-        )
-        
-        # Give server time to start
-        await asyncio.sleep(2)
-        
-        if server_process.poll() is not None:
-            error_output = server_process.stderr.read() if server_process.stderr else "Unknown error"
-            return f"❌ Server failed to start: {error_output}"
-        
-        # Create MCP server connection
-        mcp_server = MCPServerStdio(
+        # Entering returns once the MCP initialize handshake has completed
+        async with server:
+            ready.set_result(server)
+            await stop.wait()
+    except Exception as e:
+        if not ready.done():
+            ready.set_exception(e)
+        else:
+            print(f"⚠️ MCP server connection closed with an error: {e}")
+    finally:
+        # The process has exited, so another server may take over its files
+        server_slots.discard(slot)
+
+class ServerConnection:
+    """An initialised MCP server and the supervisor task that owns its connection"""
+
+    def __init__(self, server, task, stop, slot=None):
+        self.server = server
+        self.task = task
+        self.stop = stop
+        self.slot = slot
+        self.returned = 0.0  # When a user last handed it back; 0 for a never-used spare
+
+    @property
+    def alive(self):
+        return not self.task.done()
+
+    async def close(self):
+        self.stop.set()
+        await self.task
+
+def server_environment(slot):
+    """Environment of a stdio server: the HOME_* settings, with its own snapshot file and journal folder.
+    The pool runs several servers at once, each with its own home, so no two may write the same files;
+    slot 0 keeps the default paths, so a single user's home survives client restarts"""
+    env = {name: value for name, value in os.environ.items() if name.startswith("HOME_")}
+    if slot:
+        server_dir = os.path.dirname(os.path.abspath(MCP_SERVER_FILE))
+        snapshot = env.get("HOME_SNAPSHOT_FILE", os.path.join(server_dir, "home_state.snap"))
+        journal = env.get("HOME_EVENT_JOURNAL_DIR", os.path.join(server_dir, "event_journal"))
+        if snapshot:
+            root, extension = os.path.splitext(snapshot)
+            env["HOME_SNAPSHOT_FILE"] = f"{root}-{slot}{extension}"
+        if journal:
+            env["HOME_EVENT_JOURNAL_DIR"] = f"{journal.rstrip(os.sep)}-{slot}"
+    return env
+
+def create_mcp_server(slot=0):
+    """MCP server for this client: the shared HTTP server if configured, otherwise a stdio child process"""
+    # Connect to an already running shared server instead of spawning one
+    if MCP_SERVER_URL:
+        return MCPServerStreamableHttp(
             name = "Home Automation Server",
-            params = {
-                "command": sys.executable,
-                "args": [MCP_SERVER_FILE],
-            },
+            params = {"url": MCP_SERVER_URL},
             cache_tools_list = True
         )
+    return MCPServerStdio(
+        name = "Home Automation Server",
+        params = {
+            "command": sys.executable,
+            "args": [MCP_SERVER_FILE, "--transport", "stdio"],
+            "env": server_environment(slot),
+        },
+        cache_tools_list = True
+    )
+
+async def open_mcp_server():
+    """Start a server and wait until its tools are available"""
+    # The server is ready as soon as it answers the initialize handshake
+    ready = asyncio.get_running_loop().create_future()
+    stop = asyncio.Event()
+    # Lowest slot no running server holds
+    slot = None if MCP_SERVER_URL else min(set(range(len(server_slots) + 1)) - server_slots)
+    server_slots.add(slot)
+    server = create_mcp_server(slot)
+    task = asyncio.create_task(supervise_mcp_server(server, ready, stop, slot))
+    try:
+        await asyncio.wait_for(asyncio.shield(ready), MCP_SERVER_START_TIMEOUT)
+    except asyncio.TimeoutError:
+        task.cancel()
+        raise TimeoutError(f"Server did not complete the MCP handshake within {MCP_SERVER_START_TIMEOUT:.0f}s")
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+    connection = ServerConnection(server, task, stop, slot)
+    try:
+        await server.list_tools()  # Fills the tools cache
+    except Exception:
+        await connection.close()
+        raise
+    return connection
+
+async def warm_server():
+    """Open one server for the pool; drop it if the pool has filled meanwhile"""
+    try:
+        connection = await open_mcp_server()
+        if len(server_pool) < MCP_SERVER_POOL_SIZE:
+            server_pool.append(connection)
+        else:
+            await connection.close()
+    except Exception as e:
+        print(f"⚠️ Could not warm up an MCP server: {e}")
+
+def fill_server_pool():
+    """Start warming servers until MCP_SERVER_POOL_SIZE are ready or on their way"""
+    if not os.path.exists(MCP_SERVER_FILE) and not MCP_SERVER_URL:
+        return
+    server_pool[:] = [connection for connection in server_pool if connection.alive]
+    for _ in range(MCP_SERVER_POOL_SIZE - len(server_pool) - len(pool_warming)):
+        task = asyncio.create_task(warm_server())
+        pool_warming.add(task)
+        task.add_done_callback(pool_warming.discard)
+
+def pool_order(connection):
+    """Most recently returned servers first, then spares from the lowest slot (the default home) up"""
+    return connection.returned, -(connection.slot or 0)
+
+def take_from_pool():
+    """Remove and return the pooled server next in line, or None"""
+    server_pool[:] = [connection for connection in server_pool if connection.alive]
+    if not server_pool:
+        return None
+    connection = max(server_pool, key=pool_order)
+    server_pool.remove(connection)
+    return connection
+
+async def checkout_mcp_server():
+    """Take a warm server from the pool, or open a new one"""
+    connection = take_from_pool()
+    if connection is None and pool_warming:
+        # A server is already on its way up; waiting for it beats spawning another
+        await asyncio.wait(pool_warming, timeout=MCP_SERVER_START_TIMEOUT)
+        connection = take_from_pool()
+    return connection or await open_mcp_server()
+
+async def release_mcp_server(connection):
+    """Return a server to the pool, or close it if it has died.
+    Each stdio server holds its own device state, so a returned server is kept over an
+    older, never-used spare when the pool is full"""
+    if connection.alive:
+        connection.returned = time.monotonic()
+        server_pool.append(connection)
+        while len(server_pool) > MCP_SERVER_POOL_SIZE:
+            spare = min(server_pool, key=pool_order)
+            server_pool.remove(spare)
+            await spare.close()
+    else:
+        await connection.close()
+    fill_server_pool()
+
+class ChatSession:
+    """One browser user's agent, MCP server connection and conversation"""
+
+    def __init__(self):
+        self.agent = None
+        self.connection = None
+        self.previous_result = None
+        self.thread_id = gen_trace_id()
+        self.last_used = time.monotonic()
+        self.lock = asyncio.Lock()  # One turn at a time per conversation
+
+async def close_session(session):
+    """Hand a session's MCP server back to the pool (or close it), once any running turn is done"""
+    async with session.lock:
+        if session.connection is not None:
+            connection, session.connection = session.connection, None
+            await release_mcp_server(connection)
+
+async def get_session(request: gr.Request):
+    """The caller's session (created on first use), evicting idle and least recently used ones"""
+    session_id = getattr(request, "session_hash", None) or "default"
+    session = sessions.get(session_id)
+    if session is None:
+        session = sessions[session_id] = ChatSession()
+    sessions.move_to_end(session_id)
+    session.last_used = now = time.monotonic()
+    
+    # Sessions are in last-used order, so expired ones are all at the front. A session with a
+    # turn still running keeps its place: its agent may be calling tools on its server
+    evicted = []
+    for oldest_id, oldest in list(sessions.items())[:-1]:
+        if len(sessions) <= CLIENT_MAX_SESSIONS and now - oldest.last_used < CLIENT_SESSION_TIMEOUT:
+            break
+        if oldest.lock.locked():
+            continue
+        del sessions[oldest_id]
+        evicted.append(oldest)
+    await asyncio.gather(*(close_session(old) for old in evicted))
+    return session
+
+async def end_session(request: gr.Request):
+    """Close a session as soon as its browser tab goes away"""
+    session = sessions.pop(getattr(request, "session_hash", None) or "default", None)
+    if session is not None:
+        await close_session(session)
+
+async def start_mcp_server(session):
+    """Check out an MCP server for the session and update its agent"""
+    if session.connection is not None and session.connection.alive:
+        return "ℹ️ MCP Server is already running."
+    
+    try:
+        # Check if server file exists
+        if not MCP_SERVER_URL and not os.path.exists(MCP_SERVER_FILE):
+            return f"❌ MCP server file not found: {MCP_SERVER_FILE}"
         
-        # Enter the MCP server context
-        await mcp_server.__aenter__()
+        started = time.perf_counter()
+        warm = any(connection.alive for connection in server_pool)
+        session.connection = await checkout_mcp_server()
+        elapsed = time.perf_counter() - started
+        fill_server_pool()  # Replace the spare for the next user
         
         # Update agent with MCP server
-        await create_agent([mcp_server])
+        session.agent = await create_agent([session.connection.server])
         
-        return "✅ MCP Server started! AI Agent now has access to home automation tools."
+        source = "warm pool" if warm else "cold start"
+        if MCP_SERVER_URL:
+            return f"✅ Connected to shared MCP server at {MCP_SERVER_URL} in {elapsed:.2f}s ({source})! AI Agent now has access to home automation tools."
+        return f"✅ MCP Server ready in {elapsed:.2f}s ({source})! AI Agent now has access to home automation tools."
         
     except Exception as e:
         return f"❌ Error starting MCP server: {str(e)}"
 
-async def stop_mcp_server():
-    """Stop the MCP server and update agent to work without tools"""
-    global mcp_server, server_process
-    
+async def stop_mcp_server(session):
+    """Stop the session's MCP server and update its agent to work without tools"""
     try:
-        # Cleanup MCP server connection
-        if mcp_server is not None:
-            await mcp_server.__aexit__(None, None, None)
-            mcp_server = None
-        
-        # Stop server process
-        if server_process and server_process.poll() is None:
-            if os.name == 'nt':  # Windows
-                server_process.terminate()
-            else:  # Unix/Linux/macOS
-                server_process.send_signal(signal.SIGTERM)
-            
-            try:
-                server_process.wait(timeout=5)
-            except subprocess.TimeoutExpired:
-                server_process.kill()
-        
-        server_process = None
+        await close_session(session)
         
         # Update agent to work without MCP servers
-        await create_agent()
+        session.agent = await create_agent()
         
         return "🛑 MCP Server stopped. AI Agent now works without tools (general assistance only)."
         
     except Exception as e:
         return f"❌ Error stopping server: {str(e)}"
 
-async def process_user_input(user_input, history):
-    """Process user input and run the agent"""
-    global agent, previous_result, current_thread_id
-    
-    if agent is None:
-        return history + [
-            {"role": "user", "content": user_input, "avatar": "👤"},
-            {"role": "assistant", "content": "LLM not initialised. Please restart the application.", "avatar": "🤖"}
-        ], ""
-    
-    # If this is a new conversation
-    if previous_result is None:
-        current_thread_id = gen_trace_id()
+def tool_output_text(output):
+    """Text of a tool's output, which MCP tools return as content parts"""
+    parts = output if isinstance(output, list) else [output]
+    return "\n".join(part.get("text", str(part)) if isinstance(part, dict) else str(part) for part in parts)
+
+async def process_user_input_streamed(session, user_input, history):
+    """Run the session's agent, yielding the chat, cleared textbox and status as the reply streams in.
+    Tool calls show up as collapsible messages while they run"""
+    history = history + [{"role": "user", "content": user_input, "avatar": "👤"}]
+    yield history, "", "⏳ Thinking..."
     
-    # Process the input
-    with trace(workflow_name="Conversation", group_id=current_thread_id):
-        if previous_result:
+    async with session.lock:
+        # A session recreated after an idle timeout or eviction never went through app.load
+        if session.agent is None:
+            try:
+                session.agent = await create_agent([session.connection.server] if session.connection else None)
+            except Exception as e:
+                history.append({"role": "assistant", "content": f"❌ Error initialising LLM: {str(e)}", "avatar": "🤖"})
+                yield history, "", "❌ LLM not initialised."
+                return
+        
+        # If this is a new conversation
+        if session.previous_result is None:
+            session.thread_id = gen_trace_id()
+        
+        if session.previous_result:
             # Add new user message to the previous conversation
-            input_messages = previous_result.to_input_list() + [{"role": "user", "content": user_input}]
-            result = await Runner.run(starting_agent=agent, input=input_messages)
+            input_messages = session.previous_result.to_input_list() + [{"role": "user", "content": user_input}]
         else:
             # First message in the conversation
-            result = await Runner.run(starting_agent=agent, input=user_input)
-    
-    # Update previous result for next turn
-    previous_result = result
+            input_messages = user_input
+        
+        started = time.perf_counter()
+        first_token = None
+        reply = None  # Assistant message receiving text; a tool call starts a new one after it
+        tool_calls = {}
+        status = "⏳ Thinking..."
+        
+        with trace(workflow_name="Conversation", group_id=session.thread_id):
+            result = Runner.run_streamed(starting_agent=session.agent, input=input_messages)
+            async for event in result.stream_events():
+                if event.type == "raw_response_event" and event.data.type == "response.output_text.delta":
+                    if first_token is None:
+                        first_token = time.perf_counter() - started
+                        status = f"💬 First token in {first_token:.2f}s"
+                    if reply is None:
+                        reply = {"role": "assistant", "content": "", "avatar": "🤖"}
+                        history.append(reply)
+                    reply["content"] += event.data.delta
+                elif event.type == "run_item_stream_event" and event.name == "tool_called":
+                    call = event.item.raw_item
+                    tool_calls[call.call_id] = {
+                        "role": "assistant",
+                        "content": f"Arguments: {call.arguments}",
+                        "metadata": {"title": f"🔧 {call.name}", "status": "pending"},
+                        "avatar": "🤖"
+                    }
+                    history.append(tool_calls[call.call_id])
+                    reply = None
+                    status = f"🔧 Calling {call.name}..."
+                elif event.type == "run_item_stream_event" and event.name == "tool_output":
+                    message = tool_calls.get(event.item.raw_item["call_id"])
+                    if message is not None:
+                        output = tool_output_text(event.item.output)
+                        message["content"] += "\n\n" + (output if len(output) <= 1000 else output[:1000] + " …")
+                        message["metadata"]["status"] = "done"
+                    status = "⏳ Thinking..."
+                else:
+                    continue
+                yield history, "", status
+        
+        # Models that don't stream text still have a final output
+        if reply is None and result.final_output:
+            history.append({"role": "assistant", "content": str(result.final_output), "avatar": "🤖"})
+        
+        # Update previous result for next turn
+        session.previous_result = result
     
-    history.append({"role": "user", "content": user_input, "avatar": "👤"})
-    history.append({"role": "assistant", "content": result.final_output, "avatar": "🤖"})
-    return history, ""  # Return empty string to clear the textbox
+    total = time.perf_counter() - started
+    first = f"first token in {first_token:.2f}s, " if first_token is not None else ""
+    yield history, "", f"✅ Reply complete: {first}total {total:.2f}s"
 
-def reset_conversation():
+async def reset_conversation(request: gr.Request):
     """Reset conversation history"""
-    global previous_result, current_thread_id
-    previous_result = None
-    current_thread_id = gen_trace_id()
+    session = await get_session(request)
+    session.previous_result = None
+    session.thread_id = gen_trace_id()
     return [], "🔄 Conversation reset successfully!"
 
-# Gradio wrapper functions
-def gradio_initialise_llm():
+# Gradio wrapper functions: async, so Gradio awaits them on its own loop without holding a
+# worker thread, while the work itself runs on the agent loop
+def run_in_agent_loop(coro):
+    """Run a coroutine on the agent loop and return an awaitable for its result"""
+    return asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, event_loop))
+
+async def with_session(request, handler, *args):
+    """Call a handler with the caller's session"""
+    return await handler(await get_session(request), *args)
+
+async def stream_in_agent_loop(stream):
+    """Run an async generator as one task on the agent loop, yielding its items on the caller's loop.
+    One task keeps its context (e.g. the trace) intact across items"""
+    loop = asyncio.get_running_loop()
+    items = asyncio.Queue()
+    done = object()
+    
+    async def pump():
+        try:
+            async for item in stream:
+                loop.call_soon_threadsafe(items.put_nowait, item)
+        finally:
+            loop.call_soon_threadsafe(items.put_nowait, done)
+    
+    task = asyncio.run_coroutine_threadsafe(pump(), event_loop)
+    try:
+        while (item := await items.get()) is not done:
+            yield item
+        await asyncio.wrap_future(task)  # Raise the agent's error, if any
+    finally:
+        # The browser went away mid-reply: stop the agent run on its own loop
+        task.cancel()
+
+async def gradio_initialise_llm(request: gr.Request):
     """Initialise LLM on app startup"""
-    return event_loop.run_until_complete(initialise_llm())
+    return await run_in_agent_loop(with_session(request, initialise_llm))
 
-def gradio_start_server():
+async def gradio_start_server(request: gr.Request):
     """Gradio wrapper for starting MCP server"""
-    return event_loop.run_until_complete(start_mcp_server())
+    return await run_in_agent_loop(with_session(request, start_mcp_server))
 
-def gradio_stop_server():
+async def gradio_stop_server(request: gr.Request):
     """Gradio wrapper for stopping MCP server"""
-    return event_loop.run_until_complete(stop_mcp_server())
+    return await run_in_agent_loop(with_session(request, stop_mcp_server))
 
-async def gradio_chat_async(user_input, history):
+async def gradio_chat_async(user_input, history, request: gr.Request):
     """Async generator for streaming chat responses"""
-    async for result in process_user_input_streamed(user_input, history):
+    session = await run_in_agent_loop(get_session(request))
+    async for result in stream_in_agent_loop(process_user_input_streamed(session, user_input, history)):
         yield result
 
-def gradio_chat(user_input, history):
-    """Gradio wrapper for chat - use the global event loop"""
-    return event_loop.run_until_complete(
-        process_user_input(user_input, history)
-    )
+async def gradio_reset_conversation(request: gr.Request):
+    """Gradio wrapper for resetting the conversation"""
+    return await run_in_agent_loop(reset_conversation(request))
+
+async def gradio_end_session(request: gr.Request):
+    """Gradio wrapper for closing a session when its tab is closed"""
+    await run_in_agent_loop(end_session(request))
+
+async def close_all_servers():
+    """Close every session's MCP server and every pooled one"""
+    await asyncio.gather(*pool_warming, return_exceptions=True)
+    connections = server_pool[:] + [s.connection for s in sessions.values() if s.connection is not None]
+    server_pool.clear()
+    sessions.clear()
+    await asyncio.gather(*(connection.close() for connection in connections), return_exceptions=True)
 
 def shutdown():
     """Clean shutdown function"""
-    if mcp_server is not None:
-        event_loop.run_until_complete(mcp_server.__aexit__(None, None, None))
-    event_loop.close()
+    asyncio.run_coroutine_threadsafe(close_all_servers(), event_loop).result(timeout=MCP_SERVER_START_TIMEOUT)
+    event_loop.call_soon_threadsafe(event_loop.stop)
 
 def create_gradio_app():
     """Create the Gradio application"""
@@ -270,10 +542,10 @@ def create_gradio_app():
         start_btn.click(gradio_start_server, None, status_text)
         stop_btn.click(gradio_stop_server, None, status_text)
         
-        # Use regular chat responses
-        submit_btn.click(gradio_chat, [msg, chatbot], [chatbot, msg])
-        msg.submit(gradio_chat, [msg, chatbot], [chatbot, msg])
-        reset_btn.click(reset_conversation, None, [chatbot, status_text])
+        # Stream chat responses, with timings in the status box
+        submit_btn.click(gradio_chat_async, [msg, chatbot], [chatbot, msg, status_text])
+        msg.submit(gradio_chat_async, [msg, chatbot], [chatbot, msg, status_text])
+        reset_btn.click(gradio_reset_conversation, None, [chatbot, status_text])
         
         # Initialize LLM on app load
         app.load(
@@ -281,6 +553,11 @@ def create_gradio_app():
             outputs = status_text
         )
         
+        # Release the user's session when their tab is closed
+        app.unload(gradio_end_session)
+        
+    # Let users' requests overlap instead of queueing one at a time per event
+    app.queue(default_concurrency_limit=CLIENT_CONCURRENCY_LIMIT)
     return app
 
 def main():
@@ -293,6 +570,8 @@ def main():
     print("   - AZURE_OPENAI_API_DEPLOY")
     
     try:
+        # Warm the MCP server pool while Gradio starts up
+        event_loop.call_soon_threadsafe(fill_server_pool)
         app = create_gradio_app()
         app.launch(share=False)
     finally:
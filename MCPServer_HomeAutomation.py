@@ -1,176 +1,1703 @@
 from mcp.server.fastmcp import FastMCP
-from typing import Literal, Optional
-from datetime import datetime
+from mcp.server.fastmcp.exceptions import ToolError
+from mcp.types import CallToolResult, TextContent
+from pydantic import AnyUrl, BaseModel
+import numpy as np
+from typing import Annotated, Literal, NamedTuple, Optional
+from datetime import datetime, timedelta
+from array import array
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+import argparse
+import asyncio
+import atexit
+import base64
+import hashlib
+import itertools
 import json
+import mmap
+import multiprocessing
+import os
+import signal
+import struct
+import sys
+import threading
+import time
+import weakref
 
 # Initialize the MCP server
 mcp = FastMCP("Home Automation")
 
+# Device store - typed column arrays instead of one dict per device
+DEVICE_TYPES = ("light", "thermostat", "lock")
+DEVICE_STATES = ("", "off", "on", "locked", "unlocked")
+
+# Fields exposed for each device type (in display order)
+DEVICE_FIELDS = {
+    "light": ("state", "brightness"),
+    "thermostat": ("temperature", "target_temperature"),
+    "lock": ("state",)
+}
+
+# States each device type may be in
+TYPE_STATES = {
+    "light": ("off", "on"),
+    "lock": ("locked", "unlocked")
+}
+
+# Fields tools and scenes may set; a thermostat's temperature is measured, not set
+SETTABLE_FIELDS = {
+    "light": ("state", "brightness"),
+    "thermostat": ("target_temperature",),
+    "lock": ("state",)
+}
+
+# Thermostat targets the tools and scenes accept (°C)
+MIN_TARGET_TEMPERATURE = 16
+MAX_TARGET_TEMPERATURE = 30
+
+# Writers lock one of these stripes per device row; readers never lock
+LOCK_STRIPES = 64
+
+_TYPE_CODES = {sys.intern(t): i for i, t in enumerate(DEVICE_TYPES)}
+_STATE_CODES = {sys.intern(s): i for i, s in enumerate(DEVICE_STATES)}
+_LIGHT, _THERMOSTAT = _TYPE_CODES["light"], _TYPE_CODES["thermostat"]
+
+
+class Device:
+    """Lightweight view of one row in the DeviceStore, used like the old device dict.
+    Hot paths skip it and work on row numbers with DeviceStore.values()"""
+    __slots__ = ("store", "row")
+
+    def __init__(self, store, row):
+        self.store = store
+        self.row = row
+
+    def __getitem__(self, field):
+        return self.store.get_field(self.row, field)
+
+    def __setitem__(self, field, value):
+        self.store.set_field(self.row, field, value)
+
+    def get(self, field, default=None):
+        try:
+            return self[field]
+        except KeyError:
+            return default
+
+    def to_dict(self):
+        return self.store.row_to_dict(self.row)
+
+
+class DeviceStore:
+    """Column-oriented device registry with O(1) id-to-row lookup.
+
+    Writes stamp the row as modified in the next version; commit() makes that
+    version current, so readers can cache anything derived from the store by version.
+    Read-modify-write sequences must hold the rows' locks (see locked()); plain reads
+    need no lock. Cells are written inside a seqlock section (see writing()), so readers
+    of several cells use read_consistent() to never see a transaction half-applied,
+    even from another worker process.
+    """
+
+    def __init__(self):
+        self.locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self.seq_lock = threading.Lock()
+        # One-element columns so the header can be moved into shared memory like the rest
+        self.version_cell = array("Q", [0])
+        self.updated_cell = array("d", [time.time()])
+        self.seq_cell = array("Q", [0])  # Odd while a write section is applying cells
+        self.modified = array("Q")
+        self.ids = []
+        self.names = []
+        self.index = {}
+        self.types = array("B")
+        self.states = array("B")
+        self.brightness = array("B")
+        self.temperature = array("d")
+        self.target_temperature = array("d")
+
+    def add(self, device_id, name, device_type, state="", brightness=0,
+            temperature=0.0, target_temperature=0.0):
+        """Append a device and return its row number"""
+        if device_id in self.index:
+            raise ValueError(f"Duplicate device id: {device_id}")
+        row = len(self.ids)
+        # Ids and names are unique per device, so interning them would only grow the intern table
+        self.ids.append(device_id)
+        self.names.append(name)
+        self.index[device_id] = row
+        self.types.append(_TYPE_CODES[device_type])
+        self.states.append(_STATE_CODES[state])
+        self.brightness.append(brightness)
+        self.temperature.append(temperature)
+        self.target_temperature.append(target_temperature)
+        self.modified.append(self.version + 1)
+        return row
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, device_id):
+        return device_id in self.index
+
+    def __getitem__(self, device_id):
+        return Device(self, self.index[device_id])
+
+    def get(self, device_id, default=None):
+        row = self.index.get(device_id)
+        return default if row is None else Device(self, row)
+
+    def items(self):
+        for row, device_id in enumerate(self.ids):
+            yield device_id, Device(self, row)
+
+    def get_field(self, row, field):
+        if field == "state":
+            return DEVICE_STATES[self.states[row]]
+        if field == "type":
+            return DEVICE_TYPES[self.types[row]]
+        if field == "name":
+            return self.names[row]
+        if field == "temperature":
+            # Simulated readings are kept at full precision but reported to 0.1°C
+            return round(self.temperature[row], 1)
+        if field in ("brightness", "target_temperature"):
+            return getattr(self, field)[row]
+        raise KeyError(field)
+
+    def values(self, row):
+        """A row's settings as a plain tuple in DEVICE_FIELDS order, e.g. ("on", 50) for a light"""
+        code = self.types[row]
+        if code == _LIGHT:
+            return DEVICE_STATES[self.states[row]], self.brightness[row]
+        if code == _THERMOSTAT:
+            return round(self.temperature[row], 1), self.target_temperature[row]
+        return (DEVICE_STATES[self.states[row]],)
+
+    def set_field(self, row, field, value):
+        if field == "state":
+            column, value = self.states, _STATE_CODES[value]
+        elif field in ("brightness", "temperature", "target_temperature"):
+            column = getattr(self, field)
+        else:
+            raise KeyError(field)
+        if column[row] != value:
+            with self.writing():
+                column[row] = value
+                self.modified[row] = self.version + 1
+
+    def changed_since(self, version):
+        """Return the rows modified by commits after `version`, in row order"""
+        current = self.version
+        return [row for row, stamp in enumerate(self.modified) if version < stamp <= current]
+
+    def compile_writes(self, device_id, fields):
+        """Validate {field: value} for one device and resolve it into (column, row, coded value) writes"""
+        row = self.index[device_id]
+        device_type = DEVICE_TYPES[self.types[row]]
+        writes = []
+        for field, value in fields.items():
+            if field not in DEVICE_FIELDS[device_type]:
+                raise KeyError(f"{device_id} has no field '{field}'")
+            if field == "state":
+                if value not in TYPE_STATES[device_type]:
+                    raise ValueError(f"{device_id} state must be one of: {', '.join(TYPE_STATES[device_type])}")
+                writes.append((self.states, row, _STATE_CODES[value]))
+            elif field == "brightness":
+                if isinstance(value, bool) or not isinstance(value, int) or not 0 <= value <= 100:
+                    raise ValueError(f"{device_id} brightness must be an integer between 0 and 100")
+                writes.append((self.brightness, row, value))
+            else:
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    raise ValueError(f"{device_id} {field} must be a number")
+                writes.append((getattr(self, field), row, float(value)))
+        return writes
+
+    def apply_writes(self, writes):
+        """Apply compiled writes all at once, skipping cells already at the value.
+
+        If any write fails, every cell written so far is restored before re-raising.
+        Returns the changed rows in first-write order.
+        """
+        changed = {}
+        undo = []
+        with self.writing():
+            try:
+                for column, row, value in writes:
+                    if column[row] != value:
+                        undo.append((column, row, column[row], self.modified[row]))
+                        column[row] = value
+                        self.modified[row] = self.version + 1
+                        changed[row] = None
+            except Exception:
+                for column, row, old_value, old_stamp in reversed(undo):
+                    column[row] = old_value
+                    self.modified[row] = old_stamp
+                raise
+        return list(changed)
+
+    @contextmanager
+    def writing(self):
+        """Seqlock write section: the sequence is odd while cells change, and moves on once they have"""
+        with self.seq_lock:
+            self.seq_cell[0] += 1
+            try:
+                yield
+            finally:
+                self.seq_cell[0] += 1
+
+    def read_consistent(self, read):
+        """Call read() until no write section overlapped it, and return its result"""
+        while True:
+            seq = self.seq_cell[0]
+            if not seq & 1:
+                result = read()
+                if self.seq_cell[0] == seq:
+                    return result
+            time.sleep(0)  # Let the writer finish
+
+    def transaction(self):
+        return Transaction(self)
+
+    @contextmanager
+    def locked_rows(self, rows):
+        """Hold the write locks for the given rows, always taken in stripe order"""
+        stripes = sorted({row % LOCK_STRIPES for row in rows})
+        for stripe in stripes:
+            self.locks[stripe].acquire()
+        try:
+            yield
+        finally:
+            for stripe in reversed(stripes):
+                self.locks[stripe].release()
+
+    def locked(self, *device_ids):
+        """Hold the write locks for the given devices"""
+        if len(device_ids) == 1:
+            # Fast path for single-device tools: the stripe lock is itself a context manager
+            return self.locks[self.index[device_ids[0]] % LOCK_STRIPES]
+        return self.locked_rows([self.index[device_id] for device_id in device_ids])
+
+    @property
+    def version(self):
+        return self.version_cell[0]
+
+    @property
+    def updated_at(self):
+        return datetime.fromtimestamp(self.updated_cell[0])
+
+    def commit(self):
+        """Publish all writes since the last commit as a new version"""
+        self.updated_cell[0] = time.time()
+        self.version_cell[0] += 1
+        return self.version_cell[0]
+
+    def row_to_dict(self, row):
+        """Render a row in the original dict layout"""
+        device_type = DEVICE_TYPES[self.types[row]]
+        device = {"name": self.names[row], "type": device_type}
+        device.update(zip(DEVICE_FIELDS[device_type], self.values(row)))
+        return device
+
+    def to_dict(self):
+        return {device_id: self.row_to_dict(row) for row, device_id in enumerate(self.ids)}
+
+
+class Transaction:
+    """Staged writes against a DeviceStore that readers only see once commit() applies them,
+    all in one write section (readers using read_consistent() never see part of them)"""
+    __slots__ = ("store", "staged")
+
+    def __init__(self, store):
+        self.store = store
+        self.staged = {}
+
+    def stage(self, writes):
+        """Stage compiled writes; a later write to the same cell replaces an earlier one"""
+        for column, row, value in writes:
+            self.staged[(id(column), row)] = (column, row, value)
+
+    def set(self, device_id, field, value):
+        """Validate and stage one field write (raises KeyError/ValueError, staging nothing)"""
+        self.stage(self.store.compile_writes(device_id, {field: value}))
+
+    def get(self, device_id, field):
+        """Read a field, seeing this transaction's own staged writes"""
+        store = self.store
+        row = store.index[device_id]
+        column = store.states if field == "state" else getattr(store, field, None)
+        staged = self.staged.get((id(column), row))
+        if staged is None:
+            return store.get_field(row, field)
+        return DEVICE_STATES[staged[2]] if field == "state" else staged[2]
+
+    def commit(self):
+        """Apply every staged write in one pass and return the changed rows"""
+        changed = self.store.apply_writes(self.staged.values())
+        self.staged = {}
+        return changed
+
+    def rollback(self):
+        self.staged = {}
+
+
 # Initial device states
-DEVICES = {
-    "living_room_light": {
-        "name": "Living Room Light",
-        "type": "light",
-        "state": "off",
-        "brightness": 50
+DEVICES = DeviceStore()
+DEVICES.add("living_room_light", "Living Room Light", "light", state="off", brightness=50)
+DEVICES.add("thermostat", "Home Thermostat", "thermostat", temperature=22.0, target_temperature=22.0)
+DEVICES.add("front_door", "Front Door Lock", "lock", state="locked")
+DEVICES.commit()
+
+# Event log - fixed-capacity ring buffer
+EVENT_LOG_CAPACITY = int(os.getenv("HOME_EVENT_LOG_CAPACITY", "10000"))
+
+
+class Event(NamedTuple):
+    """One logged event, as stored: codes and raw values, rendered only when read (see format_event)"""
+    timestamp: int  # Epoch nanoseconds from the monotonic event clock
+    version: int    # State version the event was published in
+    subject: int    # Device row, or -1 - index into EVENT_SUBJECTS for non-device sources
+    action: int     # Index into EVENT_ACTIONS
+    args: tuple     # A device's field values (DEVICE_FIELDS order), then the action's own arguments
+
+
+class EventLog:
+    """Preallocated ring buffer with O(1) append and eviction of the oldest event.
+
+    Events are stored column-wise: timestamp, version, subject and action codes in typed
+    arrays, and only the small args tuple as an object. Events must be appended in
+    non-decreasing timestamp order; the timestamp column is the sorted index used for
+    O(log n) time-range lookups.
+    """
+
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise ValueError("Event log capacity must be at least 1")
+        self.capacity = capacity
+        self.times = array("q", bytes(8 * capacity))
+        self.versions = array("Q", bytes(8 * capacity))
+        self.subjects = array("i", bytes(4 * capacity))
+        self.actions = array("B", bytes(capacity))
+        self.args = [None] * capacity
+        self.start = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def _event(self, slot):
+        return Event(self.times[slot], self.versions[slot], self.subjects[slot], self.actions[slot], self.args[slot])
+
+    def __getitem__(self, i):
+        """Return the i-th oldest event still retained"""
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError("event index out of range")
+        return self._event((self.start + i) % self.capacity)
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self._event((self.start + i) % self.capacity)
+
+    def append(self, timestamp, version, subject, action, args):
+        end = self.start + self.count
+        if self.count < self.capacity:
+            slot = end % self.capacity
+            self.count += 1
+        else:
+            # Overwrite the oldest event in place
+            slot = self.start
+            self.start = (self.start + 1) % self.capacity
+        self.times[slot] = timestamp
+        self.versions[slot] = version
+        self.subjects[slot] = subject
+        self.actions[slot] = action
+        self.args[slot] = args
+
+    def last(self, n):
+        """Return the newest n events, oldest first"""
+        n = max(0, min(n, self.count))
+        return [self[i] for i in range(self.count - n, self.count)]
+
+    def _bisect(self, timestamp, right=False):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            value = self.times[(self.start + mid) % self.capacity]
+            if value < timestamp or (right and value == timestamp):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def span(self, start=None, end=None):
+        """Return the index range of events with start <= timestamp <= end"""
+        lo = 0 if start is None else self._bisect(start)
+        hi = self.count if end is None else self._bisect(end, right=True)
+        return lo, hi
+
+    def between(self, start=None, end=None):
+        """Return events with start <= timestamp <= end (either bound optional)"""
+        lo, hi = self.span(start, end)
+        return [self[i] for i in range(lo, hi)]
+
+
+EVENT_LOG = EventLog(EVENT_LOG_CAPACITY)
+
+# Event journal - persistent, segment-based append-only log on disk
+EVENT_JOURNAL_DIR = os.getenv(
+    "HOME_EVENT_JOURNAL_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "event_journal")
+)
+JOURNAL_SEGMENT_BYTES = int(os.getenv("HOME_JOURNAL_SEGMENT_BYTES", str(4 * 1024 * 1024)))
+JOURNAL_MAX_SEGMENTS = int(os.getenv("HOME_JOURNAL_MAX_SEGMENTS", "64"))  # 0 keeps every segment
+# Segments an event search reads past the in-memory log, so a rare device cannot make it decode them all
+JOURNAL_QUERY_SEGMENTS = int(os.getenv("HOME_JOURNAL_QUERY_SEGMENTS", "4"))  # 0 reads every segment
+JOURNAL_SYNC_RECORDS = 64      # wake the flusher after this many pending records...
+JOURNAL_SYNC_INTERVAL = 1.0    # ...and fsync at least this often while any are pending
+
+_RECORD_HEADER = struct.Struct("<I")
+
+
+class EventJournal:
+    """Append-only journal of length-prefixed JSON records split into rotated segment files"""
+
+    def __init__(self, directory, segment_bytes=JOURNAL_SEGMENT_BYTES, max_segments=JOURNAL_MAX_SEGMENTS):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        os.makedirs(directory, exist_ok=True)
+
+        # Existing segments are only listed here; they are mapped on first read
+        self.segments = sorted(
+            os.path.join(directory, f) for f in os.listdir(directory)
+            if f.startswith("segment-") and f.endswith(".log")
+        )
+        self._maps = {}
+        self._file = None
+        self._active = None
+        self._pending = 0
+        self._sealed = []  # Rotated-out segment files still waiting for their fsync
+        # Guards the file handles only; fsync runs outside it so appends never wait on the disk
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._flusher = None
+
+    def _open_segment(self):
+        """Start a fresh segment; older ones (and any torn tail they hold) are never appended to"""
+        if self._file is not None:
+            self._sealed.append(self._file)
+        number = int(os.path.basename(self.segments[-1])[8:-4]) + 1 if self.segments else 1
+        path = os.path.join(self.directory, f"segment-{number:06d}.log")
+        self._file = open(path, "ab")
+        self._active = path
+        self.segments.append(path)
+        self.prune()
+
+    def prune(self):
+        """Delete the oldest segments beyond max_segments, keeping any that a warm start would replay"""
+        if self.max_segments <= 0:
+            return
+        # Without a snapshot nothing is replayed, so the journal is only history
+        covered = snapshot_version()
+        while len(self.segments) > self.max_segments:
+            oldest = self.segments[0]
+            if covered is not None:
+                # Versions only grow, so the next segment's first record bounds every one in this segment
+                first = next(self.read_segment(self.segments[1]), None)
+                if first is None or first.get("version", 0) > covered:
+                    break
+            view = self._maps.pop(oldest, None)
+            if view is not None:
+                view.close()
+            os.remove(oldest)
+            self.segments.pop(0)
+
+    def append(self, record):
+        payload = json.dumps(record, separators=(",", ":")).encode("utf-8")
+        with self._lock:
+            if self._file is None:
+                self._open_segment()
+            elif self._file.tell() + _RECORD_HEADER.size + len(payload) > self.segment_bytes and self._file.tell():
+                self._open_segment()
+            self._file.write(_RECORD_HEADER.pack(len(payload)) + payload)
+            # Hand the record to the OS right away; the flusher group-commits the fsync
+            self._file.flush()
+            self._pending += 1
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="journal-flusher", daemon=True)
+                self._flusher.start()
+        if self._pending >= JOURNAL_SYNC_RECORDS:
+            self._wake.set()
+
+    def _flush_loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(JOURNAL_SYNC_INTERVAL)
+            self._wake.clear()
+            self.sync()
+
+    def sync(self):
+        """fsync everything appended so far, without blocking appends while the disk catches up"""
+        with self._lock:
+            sealed, self._sealed = self._sealed, []
+            # A duplicate descriptor stays valid even if the segment is rotated out or closed meanwhile
+            fd = os.dup(self._file.fileno()) if self._pending and self._file is not None else None
+            self._pending = 0
+        for f in sealed:
+            os.fsync(f.fileno())
+            f.close()
+        if fd is not None:
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def close(self):
+        if self._flusher is not None:
+            self._stop.set()
+            self._wake.set()
+            self._flusher.join()
+            self._flusher = None
+        self.sync()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                self._active = None
+        for view in self._maps.values():
+            view.close()
+        self._maps.clear()
+
+    def _map(self, path):
+        """Memory-map a segment; sealed segments are cached, the active one is remapped"""
+        view = self._maps.get(path)
+        if view is not None:
+            return view
+        size = os.path.getsize(path)
+        if size == 0:
+            return None
+        with open(path, "rb") as f:
+            view = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        if path != self._active:
+            self._maps[path] = view
+        return view
+
+    @staticmethod
+    def _spans(view):
+        """Yield (start, end) of each record in a mapped segment, stopping at a torn trailing record"""
+        offset, size = 0, len(view)
+        while offset + _RECORD_HEADER.size <= size:
+            (length,) = _RECORD_HEADER.unpack_from(view, offset)
+            start = offset + _RECORD_HEADER.size
+            if start + length > size:
+                break
+            yield start, start + length
+            offset = start + length
+
+    def read_segment(self, path):
+        """Yield the records of one segment, oldest first"""
+        view = self._map(path)
+        if view is None:
+            return
+        for start, end in self._spans(view):
+            yield json.loads(view[start:end])
+
+    def newest(self, skip=0, max_segments=0):
+        """Yield records newest first, passing over the newest `skip` without decoding them and
+        reading records from at most `max_segments` segments (0 reads them all)"""
+        read = 0
+        for path in reversed(list(self.segments)):
+            view = self._map(path)
+            if view is None:
+                continue
+            # Only the length headers are read until a record is actually wanted
+            spans = list(self._spans(view))
+            if skip >= len(spans):
+                skip -= len(spans)
+                continue
+            if max_segments and read >= max_segments:
+                return
+            read += 1
+            for start, end in reversed(spans[:len(spans) - skip]):
+                yield json.loads(view[start:end])
+            skip = 0
+
+
+EVENT_JOURNAL = EventJournal(EVENT_JOURNAL_DIR) if EVENT_JOURNAL_DIR else None
+if EVENT_JOURNAL is not None:
+    atexit.register(EVENT_JOURNAL.close)
+
+# Resource subscriptions - push "resource updated" notifications instead of polling
+NOTIFY_COALESCE_SECONDS = float(os.getenv("HOME_NOTIFY_COALESCE_SECONDS", "0.05"))
+
+_subscriptions = weakref.WeakKeyDictionary()  # session -> set of subscribed URIs
+_notify = {"version": 0, "devices": set(), "handle": None}
+
+@mcp._mcp_server.subscribe_resource()
+async def subscribe_resource(uri: AnyUrl) -> None:
+    session = mcp._mcp_server.request_context.session
+    if not _subscriptions:
+        _notify["version"] = DEVICES.version  # Nothing was tracked while nobody listened
+    _subscriptions.setdefault(session, set()).add(str(uri))
+
+@mcp._mcp_server.unsubscribe_resource()
+async def unsubscribe_resource(uri: AnyUrl) -> None:
+    session = mcp._mcp_server.request_context.session
+    _subscriptions.get(session, set()).discard(str(uri))
+
+# FastMCP always reports subscribe=False, so advertise the handlers registered above
+_get_capabilities = mcp._mcp_server.get_capabilities
+
+def _get_capabilities_with_subscribe(*args, **kwargs):
+    capabilities = _get_capabilities(*args, **kwargs)
+    if capabilities.resources is not None:
+        capabilities.resources.subscribe = True
+    return capabilities
+
+mcp._mcp_server.get_capabilities = _get_capabilities_with_subscribe
+
+def schedule_resource_updates(device_id: Optional[str] = None):
+    """Queue change notifications; everything within one window is sent as a single flush"""
+    if not _subscriptions:
+        return
+    if device_id is not None:
+        _notify["devices"].add(device_id)
+    if _notify["handle"] is not None:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return  # Called outside the server (e.g. from a script), nobody to notify
+    _notify["handle"] = loop.call_later(
+        NOTIFY_COALESCE_SECONDS, lambda: loop.create_task(send_resource_updates())
+    )
+
+async def send_resource_updates():
+    """Notify each subscribed session once per affected resource"""
+    changed = _notify["devices"]
+    changed.update(DEVICES.ids[row] for row in DEVICES.changed_since(_notify["version"]))
+    _notify.update(version=DEVICES.version, devices=set(), handle=None)
+
+    for session, uris in list(_subscriptions.items()):
+        for uri in list(uris):
+            if uri.startswith("home://device_status") or (
+                uri.startswith("home://events/") and uri[len("home://events/"):] in changed
+            ):
+                try:
+                    await session.send_resource_updated(AnyUrl(uri))
+                except Exception:
+                    # Session has gone away; forget its subscriptions
+                    _subscriptions.pop(session, None)
+                    break
+
+# Serialises version bumps and event appends so the log stays in version order
+EVENT_LOCK = threading.Lock()
+
+# Set in worker processes: only the device columns are shared between them, while the event log,
+# temperature history and scenes defined at runtime stay in the process that recorded them
+MULTI_WORKER = False
+
+# The monotonic clock, anchored once to wall-clock time so event timestamps can be shown as dates
+_CLOCK_ANCHOR_NS = time.time_ns() - time.monotonic_ns()
+
+def event_clock_ns() -> int:
+    """Current time in epoch nanoseconds, never going backwards between events"""
+    return _CLOCK_ANCHOR_NS + time.monotonic_ns()
+
+# Event actions and their text; {field} is a device field after the event, {summary} its
+# describe_values() text and {0}, {1}... the action's own arguments
+EVENT_ACTIONS = {
+    "light": "Light turned {summary}",
+    "temperature": "Temperature set to {target_temperature}°C",
+    "door": "Door {state}",
+    "scene": "Scene '{0}': {summary}",
+    "scene_unchanged": "Scene '{0}' activated (no changes)",
+    "batch": "Batch: {summary}"
+}
+_ACTION_CODES = {action: code for code, action in enumerate(EVENT_ACTIONS)}
+_ACTION_TEMPLATES = tuple(EVENT_ACTIONS.values())
+
+# Event sources that are not devices (e.g. "scene_control"), interned as negative subjects
+EVENT_SUBJECTS = []
+_SUBJECT_CODES = {}
+
+def event_subject(device_id: str) -> int:
+    """Device row for `device_id`, or a negative code for a non-device source"""
+    row = DEVICES.index.get(device_id)
+    if row is not None:
+        return row
+    code = _SUBJECT_CODES.get(device_id)
+    if code is None:
+        code = _SUBJECT_CODES[device_id] = len(EVENT_SUBJECTS)
+        EVENT_SUBJECTS.append(sys.intern(device_id))
+    return -1 - code
+
+def event_device(event: Event) -> tuple:
+    """(device id, display name) of an event's subject"""
+    if event.subject >= 0:
+        return DEVICES.ids[event.subject], DEVICES.names[event.subject]
+    device_id = EVENT_SUBJECTS[-1 - event.subject]
+    return device_id, device_id
+
+def event_action(event: Event) -> str:
+    """Render an event's action text from its code and arguments"""
+    template = _ACTION_TEMPLATES[event.action]
+    if event.subject < 0:
+        return template.format(*event.args)
+    device_type = DEVICE_TYPES[DEVICES.types[event.subject]]
+    fields = DEVICE_FIELDS[device_type]
+    values = event.args[:len(fields)]
+    return template.format(*event.args[len(fields):], summary=describe_values(device_type, values),
+                           **dict(zip(fields, values)))
+
+def format_event(event: Event) -> dict:
+    """Render a stored event for display, with a human-readable timestamp"""
+    return {
+        "timestamp": datetime.fromtimestamp(event.timestamp / 1e9).strftime("%Y-%m-%d %H:%M:%S"),
+        "device": event_device(event)[1],
+        "action": event_action(event)
+    }
+
+def log_event(device_id: str, action: str, *args):
+    """Log device events"""
+    log_events([(device_id, action, *args)])
+
+def log_events(entries):
+    """Publish pending device writes as one version and log one event per (device_id, action, *args)"""
+    # Every mutating tool finishes by logging, so this is where its writes are published
+    with EVENT_LOCK:
+        version = DEVICES.commit()
+        timestamp = event_clock_ns()
+
+        for device_id, action, *args in entries:
+            subject = event_subject(device_id)
+            if subject >= 0:
+                # The device's resulting settings render the event later and make the journal replayable
+                device_type = DEVICE_TYPES[DEVICES.types[subject]]
+                fields = DEVICE_FIELDS[device_type]
+                values = DEVICES.values(subject)
+            else:
+                values = ()
+            EVENT_LOG.append(timestamp, version, subject, _ACTION_CODES[action], values + tuple(args))
+            if EVENT_JOURNAL is not None:
+                record = {"ns": timestamp, "version": version, "device_id": device_id, "action": action, "args": args}
+                if subject >= 0:
+                    record["fields"] = dict(zip(fields, values))
+                EVENT_JOURNAL.append(record)
+            schedule_resource_updates(device_id)
+            if subject >= 0 and device_type == "thermostat":
+                TEMPERATURE_HISTORY.record(device_id, DEVICES.temperature[subject], timestamp // 1_000_000)
+
+# Temperature history - thermostat readings in compact chunks, rolled up per minute, hour and day
+TEMPERATURE_SAMPLE_SECONDS = float(os.getenv("HOME_TEMPERATURE_SAMPLE_SECONDS", "10"))
+TEMPERATURE_CHUNK_SAMPLES = 1024
+TEMPERATURE_RAW_CHUNKS = int(os.getenv("HOME_TEMPERATURE_RAW_CHUNKS", "8"))  # ~23 hours at one sample per 10 s
+
+# Rollup resolutions, coarsest last: (name, bucket width in ms, buckets kept)
+ROLLUP_LEVELS = (
+    ("minute", 60_000, 2 * 24 * 60),
+    ("hour", 3_600_000, 90 * 24),
+    ("day", 86_400_000, 10 * 366)
+)
+
+
+class SampleChunk:
+    """Up to TEMPERATURE_CHUNK_SAMPLES readings, each timestamp stored as a delta from the previous one"""
+    __slots__ = ("first", "last", "deltas", "values")
+
+    def __init__(self, timestamp: int):
+        self.first = self.last = timestamp
+        self.deltas = array("I")  # ms since the previous reading (0 for the first)
+        self.values = array("f")
+
+    def fits(self, timestamp: int) -> bool:
+        return len(self.values) < TEMPERATURE_CHUNK_SAMPLES and timestamp - self.last <= 0xFFFFFFFF
+
+    def append(self, timestamp: int, value: float):
+        self.deltas.append(timestamp - self.last)
+        self.values.append(value)
+        self.last = timestamp
+
+    def __iter__(self):
+        """Decode (timestamp, value) pairs, oldest first"""
+        timestamp = self.first
+        for delta, value in zip(self.deltas, self.values):
+            timestamp += delta
+            yield timestamp, value
+
+
+class Rollup:
+    """Min/max/sum/count per time bucket; the newest bucket is updated in place"""
+    __slots__ = ("width", "keep", "starts", "mins", "maxs", "sums", "counts")
+
+    def __init__(self, width: int, keep: int):
+        self.width = width
+        self.keep = keep
+        self.starts = array("q")
+        self.mins = array("f")
+        self.maxs = array("f")
+        self.sums = array("d")
+        self.counts = array("I")
+
+    def add(self, start: int, value: float):
+        if self.starts and self.starts[-1] == start:
+            if value < self.mins[-1]:
+                self.mins[-1] = value
+            if value > self.maxs[-1]:
+                self.maxs[-1] = value
+            self.sums[-1] += value
+            self.counts[-1] += 1
+            return
+        self.starts.append(start)
+        self.mins.append(value)
+        self.maxs.append(value)
+        self.sums.append(value)
+        self.counts.append(1)
+        if len(self.starts) >= 2 * self.keep:
+            # Trim in bulk so dropping old buckets stays amortised O(1)
+            for column in (self.starts, self.mins, self.maxs, self.sums, self.counts):
+                del column[:-self.keep]
+
+    def span(self, start: int, end: int) -> range:
+        """Indexes of the buckets starting in [start, end)"""
+        return range(bisect_left(self.starts, start), bisect_left(self.starts, end))
+
+    def fold(self, start: int, end: int, totals: list):
+        """Merge the buckets starting in [start, end) into totals [min, max, sum, count]"""
+        span = self.span(start, end)
+        if span:
+            totals[0] = min(totals[0], min(self.mins[span.start:span.stop]))
+            totals[1] = max(totals[1], max(self.maxs[span.start:span.stop]))
+            totals[2] += sum(self.sums[span.start:span.stop])
+            totals[3] += sum(self.counts[span.start:span.stop])
+
+
+class TemperatureSeries:
+    """Raw readings of one thermostat plus its rollups"""
+    __slots__ = ("chunks", "rollups")
+
+    def __init__(self):
+        self.chunks = deque(maxlen=TEMPERATURE_RAW_CHUNKS)
+        self.rollups = [Rollup(width, keep) for _, width, keep in ROLLUP_LEVELS]
+
+
+class TemperatureHistory:
+    """Per-device temperature time series. Written under EVENT_LOCK; readers never lock.
+
+    Buckets are aligned to local midnight, so "yesterday" is exactly one day bucket and a
+    window is answered from the coarsest rollups that fit inside it, refined at the edges.
+    """
+
+    def __init__(self):
+        self.series = {}
+        self.offset = 0
+        self.offset_until = -1
+
+    def local_offset(self, timestamp: int) -> int:
+        """UTC offset in ms at `timestamp`, rechecked hourly to follow daylight saving changes"""
+        if not self.offset_until > timestamp >= self.offset_until - 3_600_000:
+            self.offset = time.localtime(timestamp / 1000).tm_gmtoff * 1000
+            self.offset_until = timestamp - timestamp % 3_600_000 + 3_600_000
+        return self.offset
+
+    def align(self, timestamp: int, width: int) -> int:
+        """Start of the local-time bucket of `width` ms containing `timestamp`"""
+        return timestamp - (timestamp + self.local_offset(timestamp)) % width
+
+    def record(self, device_id: str, value: float, timestamp: int):
+        series = self.series.get(device_id)
+        if series is None:
+            series = self.series[device_id] = TemperatureSeries()
+        chunks = series.chunks
+        if not chunks or not chunks[-1].fits(timestamp):
+            chunks.append(SampleChunk(timestamp))
+        chunks[-1].append(timestamp, value)
+        for rollup in series.rollups:
+            rollup.add(self.align(timestamp, rollup.width), value)
+
+    def record_many(self, device_ids, values, timestamp: int):
+        for device_id, value in zip(device_ids, values):
+            self.record(device_id, value, timestamp)
+
+    def samples(self, device_id: str, start: int, end: int):
+        """Raw (timestamp, value) readings in [start, end) still held in memory"""
+        for chunk in self.series[device_id].chunks:
+            if chunk.last < start or chunk.first >= end:
+                continue
+            for timestamp, value in chunk:
+                if start <= timestamp < end:
+                    yield timestamp, value
+
+    def summarize(self, device_id: str, start: int, end: int) -> Optional[tuple]:
+        """(min, max, mean, readings) over [start, end), or None without readings"""
+        totals = [float("inf"), float("-inf"), 0.0, 0]
+        self._cover(device_id, len(ROLLUP_LEVELS) - 1, start, end, totals)
+        if not totals[3]:
+            return None
+        return totals[0], totals[1], totals[2] / totals[3], totals[3]
+
+    def _cover(self, device_id: str, level: int, start: int, end: int, totals: list):
+        """Fold whole buckets of `level` inside [start, end), then the edges from finer levels"""
+        if start >= end:
+            return
+        if level < 0:
+            for _, value in self.samples(device_id, start, end):
+                totals[0] = min(totals[0], value)
+                totals[1] = max(totals[1], value)
+                totals[2] += value
+                totals[3] += 1
+            return
+        rollup = self.series[device_id].rollups[level]
+        first = self.align(start - 1, rollup.width) + rollup.width  # First bucket boundary >= start
+        last = self.align(end, rollup.width)
+        if first >= last:
+            self._cover(device_id, level - 1, start, end, totals)
+            return
+        rollup.fold(first, last, totals)
+        self._cover(device_id, level - 1, start, first, totals)
+        self._cover(device_id, level - 1, last, end, totals)
+
+    def buckets(self, device_id: str, level: int, start: int, end: int, limit: int) -> list:
+        """Newest `limit` (start, min, max, mean, readings) rows of `level` overlapping [start, end)"""
+        rollup = self.series[device_id].rollups[level]
+        span = rollup.span(self.align(start, rollup.width), end)
+        return [
+            (rollup.starts[i], rollup.mins[i], rollup.maxs[i], rollup.sums[i] / rollup.counts[i], rollup.counts[i])
+            for i in span[-limit:]
+        ]
+
+
+TEMPERATURE_HISTORY = TemperatureHistory()
+
+# Scenes - declarative device settings, compiled once into device store writes
+DEFAULT_SCENES = {
+    "evening": {
+        "description": "Light on at 70%, comfortable temperature, door locked",
+        "devices": {
+            "living_room_light": {"state": "on", "brightness": 70},
+            "thermostat": {"target_temperature": 19.0},
+            "front_door": {"state": "locked"}
+        }
     },
-    "thermostat": {
-        "name": "Home Thermostat",
-        "type": "thermostat",
-        "temperature": 22.0,
-        "target_temperature": 22.0
+    "morning": {
+        "description": "Light on bright, slightly warmer, door unlocked",
+        "devices": {
+            "living_room_light": {"state": "on", "brightness": 90},
+            "thermostat": {"target_temperature": 23.0},
+            "front_door": {"state": "unlocked"}
+        }
     },
-    "front_door": {
-        "name": "Front Door Lock",
-        "type": "lock",
-        "state": "locked"
+    "away": {
+        "description": "Everything off and secure, heating turned down to the 16°C minimum",
+        "devices": {
+            "living_room_light": {"state": "off"},
+            "thermostat": {"target_temperature": 16.0},
+            "front_door": {"state": "locked"}
+        }
     }
 }
+SCENES_FILE = os.getenv("HOME_SCENES_FILE")
 
-# Simple event log
-EVENT_LOG = []
+SCENES = {}
+COMPILED_SCENES = {}
 
-def log_event(device_id: str, action: str):
-    """Log device events"""
-    # Handle special case for scene control
-    device_name = DEVICES.get(device_id, {}).get("name", device_id)
-    
-    event = {
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "device": device_name,
-        "action": action
-    }
-    EVENT_LOG.append(event)
-    # Keep only last 10 events
-    if len(EVENT_LOG) > 10:
-        EVENT_LOG.pop(0)
+def setting_error(device_type: str, field: str, value) -> Optional[str]:
+    """Return why `value` cannot be set on a device's `field`, or None: the limits tools and scenes share"""
+    if field not in SETTABLE_FIELDS[device_type]:
+        return f"{field} cannot be set on a {device_type}"
+    if field == "brightness" and (isinstance(value, bool) or not isinstance(value, int) or not 0 <= value <= 100):
+        return "brightness must be an integer between 0 and 100"
+    if field == "target_temperature" and (
+            isinstance(value, bool) or not isinstance(value, (int, float))
+            or not MIN_TARGET_TEMPERATURE <= value <= MAX_TARGET_TEMPERATURE):
+        return f"temperature must be between {MIN_TARGET_TEMPERATURE}°C and {MAX_TARGET_TEMPERATURE}°C"
+    return None
+
+def add_scene(name: str, scene: dict):
+    """Validate and compile a scene definition, then make it available"""
+    writes = []
+    for device_id, fields in scene["devices"].items():
+        if device_id not in DEVICES:
+            raise KeyError(f"Unknown device '{device_id}'")
+        device_type = DEVICES[device_id]['type']
+        for field, value in fields.items():
+            error = setting_error(device_type, field, value)
+            if error:
+                raise ValueError(f"{device_id} {error}")
+        writes.extend(DEVICES.compile_writes(device_id, fields))
+    SCENES[name] = scene
+    COMPILED_SCENES[name] = writes
+
+def load_scenes(path: str):
+    """Load scene definitions from a JSON file of {name: {"description", "devices"}}"""
+    with open(path, encoding="utf-8") as f:
+        for name, scene in json.load(f).items():
+            add_scene(name, scene)
+
+def describe_values(device_type: str, values: tuple) -> str:
+    """Short human-readable summary of a device's settings, given in DEVICE_FIELDS order"""
+    if device_type == 'light':
+        state, brightness = values
+        return state + (f" at {brightness}%" if state == "on" else "")
+    if device_type == 'thermostat':
+        temperature, target_temperature = values
+        return f"target {target_temperature}°C, now {temperature}°C"
+    return values[0]
+
+def describe_device(row: int) -> str:
+    """Short human-readable summary of a device's current settings"""
+    return describe_values(DEVICE_TYPES[DEVICES.types[row]], DEVICES.values(row))
+
+for _name, _scene in DEFAULT_SCENES.items():
+    add_scene(_name, _scene)
+if SCENES_FILE:
+    load_scenes(SCENES_FILE)
+
+# Tool result schemas - typed structured content, returned next to a short text rendering
+class DeviceState(BaseModel):
+    """One device's settings; fields that don't apply to its type are left out"""
+    device_id: str
+    name: str
+    type: Literal["light", "thermostat", "lock"]
+    state: Optional[Literal["on", "off", "locked", "unlocked"]] = None
+    brightness: Optional[int] = None
+    temperature: Optional[float] = None
+    target_temperature: Optional[float] = None
+
+class DeviceList(BaseModel):
+    version: int
+    columns: list[str]
+    rows: list[tuple[str, str, str, Optional[str], Optional[int], Optional[float], Optional[float]]]
+    next_cursor: Optional[str] = None
+
+class LightResult(BaseModel):
+    device_id: str
+    state: Literal["on", "off"]
+    brightness: int
+
+class ThermostatResult(BaseModel):
+    device_id: str
+    target_temperature: float
+    previous_target_temperature: float
+    temperature: float
+
+class LockResult(BaseModel):
+    device_id: str
+    state: Literal["locked", "unlocked"]
+
+class SceneResult(BaseModel):
+    scene: str
+    changed: list[DeviceState]
+
+def tool_result(text: str, data: dict) -> CallToolResult:
+    """Structured content for programs plus its short text rendering for the LLM and text-only clients"""
+    return CallToolResult(content=[TextContent(type="text", text=text)], structuredContent=data)
+
+def device_state(row: int) -> dict:
+    """DeviceState fields of one row"""
+    return {"device_id": DEVICES.ids[row], **DEVICES.row_to_dict(row)}
 
 # TOOLS - Functions that AI can call to perform actions
+# Compact list_devices formats: fixed column order, one row per device
+DEVICE_COLUMNS = ("id", "name", "type", "state", "bri", "temp", "target")
+_TYPE_ABBREVIATIONS = {"light": "L", "thermostat": "T", "lock": "K"}
+_TYPE_LEGEND = {abbreviation: name for name, abbreviation in _TYPE_ABBREVIATIONS.items()}
+
+# Pages of devices - rows are only ever appended, so a row number is a stable position
+DEVICE_PAGE_SIZE = int(os.getenv("HOME_DEVICE_PAGE_SIZE", "100"))
+
+def select_devices(device_type: Optional[str] = None, state: Optional[str] = None,
+                   start: int = 0, stop: Optional[int] = None) -> list:
+    """Rows in [start, stop) matching a type and/or state, found with one vectorized pass over the code columns"""
+    types = np.frombuffer(DEVICES.types, dtype=np.uint8)[start:stop]
+    states = np.frombuffer(DEVICES.states, dtype=np.uint8)[start:stop]
+    mask = np.ones(len(types), dtype=bool)
+    if device_type is not None:
+        mask &= types == _TYPE_CODES[device_type]
+    if state is not None:
+        mask &= states == _STATE_CODES.get(state, -1)
+    rows = (np.flatnonzero(mask) + start).tolist()
+    del types, states  # Release the buffers so the store can grow again
+    return rows
+
+def encode_cursor(row: int) -> str:
+    return base64.urlsafe_b64encode(f"row:{row}".encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> int:
+    """Row a cursor points at; raises ValueError for anything encode_cursor did not produce"""
+    try:
+        text = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    prefix, _, row = text.partition(":")
+    if prefix != "row" or not row.isdigit():
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return int(row)
+
+def page_devices(device_type: Optional[str] = None, state: Optional[str] = None,
+                 start: int = 0, limit: int = DEVICE_PAGE_SIZE) -> tuple:
+    """Up to `limit` matching rows from `start` on, and the row the next page starts at (None at the end).
+
+    Unfiltered pages are a plain row range; filtered ones scan the code columns in growing
+    windows, so a page costs O(page size) unless matches are sparse.
+    """
+    total = len(DEVICES)
+    if device_type is None and state is None:
+        stop = min(start + limit, total)
+        return range(start, stop), stop if stop < total else None
+
+    rows = []
+    window = max(4 * limit, 1024)
+    while start < total:
+        stop = min(start + window, total)
+        rows.extend(select_devices(device_type, state, start, stop)[:limit - len(rows)])
+        if len(rows) == limit:
+            return rows, rows[-1] + 1 if rows[-1] + 1 < total else None
+        start = stop
+        window *= 2
+    return rows, None
+
+def device_rows(rows) -> list:
+    """[id, name, type, state, brightness, temperature, target] per row; unused fields are None"""
+    store = DEVICES
+    thermostat, light = _TYPE_CODES["thermostat"], _TYPE_CODES["light"]
+    table = []
+    for row in rows:
+        code = store.types[row]
+        if code == thermostat:
+            table.append([store.ids[row], store.names[row], DEVICE_TYPES[code], None, None,
+                          round(store.temperature[row], 1), store.target_temperature[row]])
+        else:
+            table.append([store.ids[row], store.names[row], DEVICE_TYPES[code], DEVICE_STATES[store.states[row]],
+                          store.brightness[row] if code == light else None, None, None])
+    return table
+
+def render_devices(format: str, table: list, next_cursor: Optional[str], paged: bool) -> str:
+    """Text rendering of device_rows() output in a list_devices format"""
+    if format == "json":
+        listing = {"columns": DEVICE_COLUMNS, "types": _TYPE_LEGEND,
+                   "rows": [[device_id, name, _TYPE_ABBREVIATIONS[device_type], *settings]
+                            for device_id, name, device_type, *settings in table]}
+        if paged:
+            listing["next_cursor"] = next_cursor
+        return json.dumps(listing, separators=(",", ":"), ensure_ascii=False)
+
+    if format == "table":
+        lines = ["|".join(DEVICE_COLUMNS) + "  (type: L=light T=thermostat K=lock)"]
+        lines.extend(
+            f"{device_id}|{name}|{_TYPE_ABBREVIATIONS[device_type]}|{device_state or ''}|"
+            f"{'' if brightness is None else brightness}|{'' if temperature is None else temperature}|"
+            f"{'' if target is None else target}"
+            for device_id, name, device_type, device_state, brightness, temperature, target in table
+        )
+        if next_cursor:
+            lines.append(f"next_cursor={next_cursor}")
+        return "\n".join(lines)
+
+    parts = ["📱 Home Devices Status:\n\n"]
+    for device_id, name, device_type, device_state, brightness, temperature, target in table:
+        parts.append(f"🔹 {name} ({device_id})\n")
+        if device_type == 'light':
+            parts.append(f"   State: {device_state}\n   Brightness: {brightness}%\n")
+        elif device_type == 'thermostat':
+            parts.append(f"   Current: {temperature}°C\n   Target: {target}°C\n")
+        elif device_type == 'lock':
+            parts.append(f"   State: {device_state}\n")
+        parts.append("\n")
+    if next_cursor:
+        parts.append(f"➡️ More devices: call again with cursor=\"{next_cursor}\"\n")
+    return "".join(parts)
+
 @mcp.tool()
-def list_devices() -> str:
-    """List all available devices and their current states"""
-    result = "📱 Home Devices Status:\n\n"
-    
-    for device_id, device in DEVICES.items():
-        result += f"🔹 {device['name']} ({device_id})\n"
-        
-        if device['type'] == 'light':
-            result += f"   State: {device['state']}\n"
-            result += f"   Brightness: {device['brightness']}%\n"
-        elif device['type'] == 'thermostat':
-            result += f"   Current: {device['temperature']}°C\n"
-            result += f"   Target: {device['target_temperature']}°C\n"
-        elif device['type'] == 'lock':
-            result += f"   State: {device['state']}\n"
-        
-        result += "\n"
-    
-    return result
+def list_devices(format: Literal["text", "table", "json"] = "text",
+                 device_type: Optional[Literal["light", "thermostat", "lock"]] = None,
+                 state: Optional[Literal["on", "off", "locked", "unlocked"]] = None,
+                 page_size: Optional[int] = None, cursor: Optional[str] = None) -> Annotated[CallToolResult, DeviceList]:
+    """List devices and their current states, optionally only one type and/or state.
+    format="table" (pipe-separated) or "json" (column list + rows) abbreviate types and use far fewer
+    tokens than "text" for large homes. For large homes set page_size, then pass the returned cursor
+    to get the next page"""
+    paged = page_size is not None or cursor is not None
+    if paged:
+        try:
+            start = decode_cursor(cursor) if cursor else 0
+        except ValueError as e:
+            raise ToolError(f"❌ Error: {e}")
+
+    def read():
+        if paged:
+            rows, next_row = page_devices(device_type, state, start, max(1, page_size or DEVICE_PAGE_SIZE))
+        else:
+            rows = select_devices(device_type, state) if device_type or state else range(len(DEVICES))
+            next_row = None
+        return DEVICES.version, device_rows(rows), next_row
+
+    version, table, next_row = DEVICES.read_consistent(read)
+    next_cursor = None if next_row is None else encode_cursor(next_row)
+    listing = {"version": version, "columns": DEVICE_COLUMNS, "rows": table, "next_cursor": next_cursor}
+    return tool_result(render_devices(format, table, next_cursor, paged), listing)
 
 @mcp.tool()
-def control_light(action: Literal["on", "off", "toggle"], brightness: Optional[int] = None) -> str:
+def control_light(action: Literal["on", "off", "toggle"], brightness: Optional[int] = None) -> Annotated[CallToolResult, LightResult]:
     """Control the living room light (on/off/toggle) and optionally set brightness (0-100)"""
-    device = DEVICES["living_room_light"]
-    
-    # Handle brightness first (but don't change state yet)
-    if brightness is not None:
-        if 0 <= brightness <= 100:
-            device['brightness'] = brightness
-        else:
-            return "❌ Error: Brightness must be between 0 and 100"
+    row = DEVICES.index["living_room_light"]
+    with DEVICES.locked_rows((row,)):
+        # Handle brightness first (but don't change state yet)
+        if brightness is not None:
+            if 0 <= brightness <= 100:
+                DEVICES.set_field(row, 'brightness', brightness)
+            else:
+                raise ToolError("❌ Error: Brightness must be between 0 and 100")
     
-    if action == "on":
-        device['state'] = "on"
-    elif action == "off":
-        device['state'] = "off"
-    elif action == "toggle":
-        device['state'] = "on" if device['state'] == "off" else "off"
+        if action == "toggle":
+            action = "on" if DEVICES.get_field(row, 'state') == "off" else "off"
+        # If brightness is 0, force the light off regardless of action
+        DEVICES.set_field(row, 'state', "off" if brightness == 0 else action)
     
-    # If brightness is 0, force the light off regardless of action
-    if brightness == 0:
-        device['state'] = "off"
+        log_event("living_room_light", "light")
+        state, brightness = DEVICES.values(row)
     
-    log_event("living_room_light", f"Light turned {device['state']}" + 
-              (f" at {device['brightness']}%" if device['state'] == "on" else ""))
-    
-    return f"✅ Living Room Light is now {device['state']}" + (
-        f" at {device['brightness']}% brightness" if device['state'] == "on" else ""
-    )
+    text = f"✅ Living Room Light is now {state}" + (f" at {brightness}% brightness" if state == "on" else "")
+    return tool_result(text, {"device_id": "living_room_light", "state": state, "brightness": brightness})
 
 @mcp.tool()
-def set_temperature(target_temperature: float) -> str:
+def set_temperature(target_temperature: float) -> Annotated[CallToolResult, ThermostatResult]:
     """Set the target temperature for the thermostat (16-30°C)"""
-    if not (16 <= target_temperature <= 30):
-        return "❌ Error: Temperature must be between 16°C and 30°C"
-    
-    device = DEVICES["thermostat"]
-    old_target = device['target_temperature']
-    device['target_temperature'] = target_temperature
+    if not (MIN_TARGET_TEMPERATURE <= target_temperature <= MAX_TARGET_TEMPERATURE):
+        raise ToolError(f"❌ Error: Temperature must be between {MIN_TARGET_TEMPERATURE}°C and {MAX_TARGET_TEMPERATURE}°C")
     
-    # Simulate gradual temperature change
-    temp_diff = target_temperature - device['temperature']
-    device['temperature'] = round(device['temperature'] + (temp_diff * 0.2), 1)
+    row = DEVICES.index["thermostat"]
+    with DEVICES.locked_rows((row,)):
+        old_target = DEVICES.target_temperature[row]
+        DEVICES.set_field(row, 'target_temperature', target_temperature)
     
-    log_event("thermostat", f"Temperature set to {target_temperature}°C")
+        # The thermal simulation moves the current temperature towards the target over time
+        log_event("thermostat", "temperature")
+        temperature, target = DEVICES.values(row)
     
-    return f"🌡️ Thermostat set to {target_temperature}°C (was {old_target}°C)\nCurrent temperature: {device['temperature']}°C"
+    text = f"🌡️ Thermostat set to {target_temperature}°C (was {old_target}°C)\nCurrent temperature: {temperature}°C"
+    return tool_result(text, {
+        "device_id": "thermostat",
+        "target_temperature": target,
+        "previous_target_temperature": old_target,
+        "temperature": temperature
+    })
 
 @mcp.tool()
-def control_door_lock(action: Literal["lock", "unlock"]) -> str:
+def control_door_lock(action: Literal["lock", "unlock"]) -> Annotated[CallToolResult, LockResult]:
     """Lock or unlock the front door"""
-    device = DEVICES["front_door"]
-    
-    if action == "lock":
-        device['state'] = "locked"
-    elif action == "unlock":
-        device['state'] = "unlocked"
-    
-    log_event("front_door", f"Door {action}ed")
+    row = DEVICES.index["front_door"]
+    with DEVICES.locked_rows((row,)):
+        DEVICES.set_field(row, 'state', "locked" if action == "lock" else "unlocked")
+        log_event("front_door", "door")
+        state = DEVICES.get_field(row, 'state')
     
-    return f"🚪 Front door is now {device['state']}"
+    return tool_result(f"🚪 Front door is now {state}", {"device_id": "front_door", "state": state})
 
 @mcp.tool()
-def activate_scene(scene: Literal["evening", "morning", "away"]) -> str:
-    """Activate a preset scene that controls multiple devices"""
-    actions = []
-    
-    if scene == "evening":
-        # Evening: Light on at 70%, comfortable temperature
-        DEVICES["living_room_light"]["state"] = "on"
-        DEVICES["living_room_light"]["brightness"] = 70
-        DEVICES["thermostat"]["target_temperature"] = 19.0
-        DEVICES["front_door"]["state"] = "locked"
-        actions = ["Living room light on at 70%", "Temperature set to 19°C", "Front door locked"]
-        
-    elif scene == "morning":
-        # Morning: Light on bright, slightly warmer
-        DEVICES["living_room_light"]["state"] = "on"
-        DEVICES["living_room_light"]["brightness"] = 90
-        DEVICES["thermostat"]["target_temperature"] = 23.0
-        DEVICES["front_door"]["state"] = "unlocked"
-        actions = ["Living room light on at 90%", "Temperature set to 23°C", "Front door unlocked"]
-        
-    elif scene == "away":
-        # Away: Everything off/secure
-        DEVICES["living_room_light"]["state"] = "off"
-        DEVICES["thermostat"]["target_temperature"] = 15.0
-        DEVICES["front_door"]["state"] = "locked"
-        actions = ["Light turned off", "Temperature lowered to 15°C", "Front door locked"]
-    
-    log_event("scene_control", f"Scene '{scene}' activated")
-    
-    return f"🎬 Scene '{scene}' activated!\n✅ " + "\n✅ ".join(actions)
+def list_scenes() -> str:
+    """List the available scenes and what each one does"""
+    lines = ["🎬 Available scenes:"]
+    for name, scene in SCENES.items():
+        lines.append(f"- {name}: {scene.get('description', '')}")
+    return "\n".join(lines)
+
+@mcp.tool()
+def activate_scene(scene: str) -> Annotated[CallToolResult, SceneResult]:
+    """Activate a preset scene that controls multiple devices (see list_scenes, e.g. evening, morning, away)"""
+    writes = COMPILED_SCENES.get(scene)
+    if writes is None:
+        raise ToolError(f"❌ Error: Unknown scene '{scene}'. Available: {', '.join(SCENES)}")
+
+    with DEVICES.locked_rows(row for _, row, _ in writes):
+        txn = DEVICES.transaction()
+        txn.stage(writes)
+        changed = txn.commit()
+        if not changed:
+            log_event("scene_control", "scene_unchanged", scene)
+            return tool_result(f"🎬 Scene '{scene}' activated!\n✅ All devices were already set",
+                               {"scene": scene, "changed": []})
+
+        summaries = [describe_device(row) for row in changed]
+        states = [device_state(row) for row in changed]
+        log_events([(DEVICES.ids[row], "scene", scene) for row in changed])
+
+    actions = [f"{DEVICES.names[row]}: {summary}" for row, summary in zip(changed, summaries)]
+    return tool_result(f"🎬 Scene '{scene}' activated!\n✅ " + "\n✅ ".join(actions), {"scene": scene, "changed": states})
+
+@mcp.tool()
+def define_scene(name: str, devices: dict[str, dict[str, str | bool | int | float]], description: str = "") -> str:
+    """Create or replace a scene. devices maps device_id to the fields to set,
+    e.g. {"living_room_light": {"state": "on", "brightness": 40}, "thermostat": {"target_temperature": 21}}"""
+    try:
+        add_scene(name, {"description": description, "devices": devices})
+    except (KeyError, ValueError, TypeError) as e:
+        return f"❌ Error: Invalid scene: {e}"
+    return f"🎬 Scene '{name}' saved with {len(devices)} device(s)"
+
+# Actions accepted by batch_control for each device type
+COMMAND_ACTIONS = {
+    "light": ("on", "off", "toggle"),
+    "thermostat": ("set",),
+    "lock": ("lock", "unlock")
+}
+
+
+class DeviceCommand(BaseModel):
+    """One command for batch_control"""
+    device_id: str
+    action: str
+    brightness: Optional[int] = None
+    target_temperature: Optional[float] = None
+
+
+def validate_command(command: DeviceCommand) -> Optional[str]:
+    """Return an error message if the command cannot be applied, otherwise None"""
+    row = DEVICES.index.get(command.device_id)
+    if row is None:
+        return f"unknown device '{command.device_id}'"
+    device_type = DEVICE_TYPES[DEVICES.types[row]]
+    allowed = COMMAND_ACTIONS[device_type]
+    if command.action not in allowed:
+        return f"action must be one of: {', '.join(allowed)}"
+    if device_type == 'light' and command.brightness is not None:
+        return setting_error('light', 'brightness', command.brightness)
+    if device_type == 'thermostat':
+        if command.target_temperature is None:
+            return "target_temperature is required"
+        return setting_error('thermostat', 'target_temperature', command.target_temperature)
+    return None
+
+def stage_command(txn: Transaction, command: DeviceCommand):
+    """Stage a validated command's writes in the transaction"""
+    device_id = command.device_id
+    device_type = DEVICE_TYPES[DEVICES.types[DEVICES.index[device_id]]]
+
+    if device_type == 'light':
+        if command.brightness is not None:
+            txn.set(device_id, 'brightness', command.brightness)
+        if command.action == "toggle":
+            txn.set(device_id, 'state', "on" if txn.get(device_id, 'state') == "off" else "off")
+        else:
+            txn.set(device_id, 'state', command.action)
+        # If brightness is 0, force the light off regardless of action
+        if command.brightness == 0:
+            txn.set(device_id, 'state', "off")
+
+    elif device_type == 'thermostat':
+        txn.set(device_id, 'target_temperature', command.target_temperature)
+
+    else:
+        txn.set(device_id, 'state', "locked" if command.action == "lock" else "unlocked")
+
+@mcp.tool()
+def batch_control(commands: list[DeviceCommand]) -> str:
+    """Control many devices in one call. Each command has device_id and action
+    (light: on/off/toggle with optional brightness 0-100; thermostat: set with
+    target_temperature 16-30; lock: lock/unlock). All commands are validated first;
+    if any is invalid, nothing is applied."""
+    if not commands:
+        return "❌ Error: No commands given"
+
+    errors = [(i, validate_command(command)) for i, command in enumerate(commands)]
+    errors = [(i, error) for i, error in errors if error]
+    if errors:
+        lines = [f"❌ {len(errors)} of {len(commands)} command(s) invalid, nothing applied:"]
+        lines += [f"{i + 1}|{commands[i].device_id}|{commands[i].action}|{error}" for i, error in errors]
+        return "\n".join(lines)
+
+    results = []
+    with DEVICES.locked(*{command.device_id for command in commands}):
+        txn = DEVICES.transaction()
+        try:
+            for command in commands:
+                stage_command(txn, command)
+                # Each command's own outcome, before later commands in the batch change the device again
+                device_type = DEVICE_TYPES[DEVICES.types[DEVICES.index[command.device_id]]]
+                values = tuple(txn.get(command.device_id, field) for field in DEVICE_FIELDS[device_type])
+                results.append(describe_values(device_type, values))
+            changed = txn.commit()
+        except (KeyError, ValueError, TypeError, OverflowError) as e:
+            txn.rollback()
+            return f"❌ Error: Batch rolled back, nothing applied: {e}"
+
+        # Like scenes: one event per device that actually changed
+        if changed:
+            log_events([(DEVICES.ids[row], "batch") for row in changed])
+
+    lines = [f"📦 {len(commands)} command(s) applied, {len(changed)} device(s) changed:", "#|device|action|result"]
+    for i, (command, result) in enumerate(zip(commands, results)):
+        lines.append(f"{i + 1}|{command.device_id}|{command.action}|{result}")
+    return "\n".join(lines)
+
+def _parse_event_time(value: str, now: datetime) -> datetime:
+    """Parse an ISO date/time, "today"/"yesterday" (their midnight), or a bare HH:MM meaning its most recent occurrence.
+    Always returns naive local time: ISO values with a UTC offset are converted, so any two results compare"""
+    if value.lower() in ("today", "yesterday"):
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        return midnight if value.lower() == "today" else midnight - timedelta(days=1)
+    try:
+        clock = datetime.strptime(value, "%H:%M")
+    except ValueError:
+        moment = datetime.fromisoformat(value)
+        return moment.astimezone().replace(tzinfo=None) if moment.tzinfo else moment
+    moment = now.replace(hour=clock.hour, minute=clock.minute, second=0, microsecond=0)
+    return moment if moment <= now else moment - timedelta(days=1)
+
+def journal_event(record: dict) -> Optional[Event]:
+    """Rebuild a journal record as an Event, or None if it can no longer be rendered"""
+    code = _ACTION_CODES.get(record.get("action"))
+    if code is None:
+        return None
+    # Older journals stored epoch milliseconds in "timestamp"
+    timestamp = record["ns"] if "ns" in record else record["timestamp"] * 1_000_000
+    args = tuple(record.get("args", ()))
+    subject = event_subject(record["device_id"])
+    if subject >= 0:
+        fields = DEVICE_FIELDS[DEVICE_TYPES[DEVICES.types[subject]]]
+        values = record.get("fields", {})
+        if set(values) != set(fields):
+            return None  # The device changed type, or the record predates its settings
+        args = tuple(values[field] for field in fields) + args
+    event = Event(timestamp, record.get("version", 0), subject, code, args)
+    try:
+        event_action(event)
+    except (KeyError, IndexError, ValueError):
+        return None
+    return event
+
+def journal_events(start_ns: Optional[int] = None, end_ns: Optional[int] = None,
+                   segments: int = JOURNAL_QUERY_SEGMENTS):
+    """Yield journaled events older than the event log holds, newest first, back to start_ns
+    or through at most `segments` journal segments"""
+    if EVENT_JOURNAL is None:
+        return
+    try:
+        # The log holds exactly the newest len(EVENT_LOG) records this process journaled
+        for record in EVENT_JOURNAL.newest(skip=len(EVENT_LOG), max_segments=segments):
+            event = journal_event(record)
+            if event is None or (end_ns is not None and event.timestamp > end_ns):
+                continue
+            if start_ns is not None and event.timestamp < start_ns:
+                return
+            yield event
+    except (OSError, ValueError):
+        return  # A segment was pruned while being read; everything older is gone too
+
+def find_events(device: Optional[str] = None, action: Optional[str] = None,
+                start_ns: Optional[int] = None, end_ns: Optional[int] = None,
+                limit: int = 50, journal_segments: int = JOURNAL_QUERY_SEGMENTS) -> list:
+    """Return up to `limit` newest matching events (oldest first) from the event log,
+    reading on into up to `journal_segments` journal segments when the window reaches back past the log's oldest event"""
+    lo, hi = EVENT_LOG.span(start_ns, end_ns)
+    events = (EVENT_LOG[i] for i in range(hi - 1, lo - 1, -1))
+    if lo == 0 and (start_ns is None or not EVENT_LOG.count or start_ns <= EVENT_LOG[0].timestamp):
+        events = itertools.chain(events, journal_events(start_ns, end_ns, journal_segments))
+
+    needle = action.lower() if action else None
+    matches = []
+    for event in events:
+        if device and device not in event_device(event):
+            continue
+        if needle and needle not in event_action(event).lower():
+            continue
+        matches.append(event)
+        if len(matches) >= limit:
+            break
+    matches.reverse()
+    return matches
+
+@mcp.tool()
+def query_events(device: Optional[str] = None, action: Optional[str] = None,
+                 since: Optional[str] = None, until: Optional[str] = None,
+                 limit: int = 50) -> str:
+    """Search the event history by device (id or name), action text and time window.
+    since/until take ISO date-times (local, or with a UTC offset) or HH:MM (e.g. since="22:00", until="06:00" for last night)"""
+    now = datetime.now()
+    try:
+        end = _parse_event_time(until, now) if until else None
+        start = _parse_event_time(since, end or now) if since else None
+    except ValueError:
+        return "❌ Error: Times must be ISO date-times (2025-01-31T22:00) or HH:MM"
+    if start and end and start > end:
+        return "❌ Error: 'since' must be before 'until'"
+
+    events = find_events(
+        device, action,
+        int(start.timestamp() * 1e9) if start else None,
+        int(end.timestamp() * 1e9) if end else None,
+        max(1, limit)
+    )
+    if not events:
+        return "📜 No matching events found"
+
+    lines = [f"📜 {len(events)} matching event(s):"]
+    for event in events:
+        shown = format_event(event)
+        lines.append(f"{shown['timestamp']} - {shown['device']}: {shown['action']}")
+    return "\n".join(lines)
+
+@mcp.tool()
+def temperature_history(device: str = "thermostat", since: Optional[str] = None, until: Optional[str] = None,
+                        resolution: Optional[Literal["minute", "hour", "day"]] = None, limit: int = 24) -> str:
+    """Min/max/average temperature of a thermostat (id or name) over a time window, from precomputed rollups.
+    since/until take ISO date-times (local, or with a UTC offset), "today"/"yesterday" or HH:MM
+    (since="yesterday", until="today" for all of yesterday).
+    Set resolution to also list the newest `limit` per-minute, per-hour or per-day rows"""
+    device_id = device if device in TEMPERATURE_HISTORY.series else next(
+        (device_id for device_id in TEMPERATURE_HISTORY.series
+         if device.lower() in DEVICES[device_id]["name"].lower()), None)
+    if device_id is None:
+        return f"❌ Error: No temperature history for '{device}'"
+
+    now = datetime.now()
+    try:
+        end = _parse_event_time(until, now) if until else now
+        # Without `since`, start from the oldest day still held
+        first_day = TEMPERATURE_HISTORY.series[device_id].rollups[-1].starts[0]
+        start = _parse_event_time(since, end) if since else datetime.fromtimestamp(first_day / 1000)
+    except ValueError:
+        return "❌ Error: Times must be ISO date-times (2025-01-31T22:00), today/yesterday or HH:MM"
+    if start > end:
+        return "❌ Error: 'since' must be before 'until'"
+
+    start_ms, end_ms = int(start.timestamp() * 1000), int(end.timestamp() * 1000)
+    summary = TEMPERATURE_HISTORY.summarize(device_id, start_ms, end_ms)
+    if summary is None:
+        return f"🌡️ No temperature readings for {DEVICES[device_id]['name']} in that window"
+
+    low, high, mean, readings = summary
+    lines = [
+        f"🌡️ {DEVICES[device_id]['name']} {start:%Y-%m-%d %H:%M} → {end:%Y-%m-%d %H:%M}: "
+        f"avg {mean:.1f}°C, min {low:.1f}°C, max {high:.1f}°C ({readings} readings)"
+    ]
+    if resolution:
+        level = [name for name, _, _ in ROLLUP_LEVELS].index(resolution)
+        for bucket, low, high, mean, readings in TEMPERATURE_HISTORY.buckets(device_id, level, start_ms, end_ms, max(1, limit)):
+            lines.append(
+                f"{datetime.fromtimestamp(bucket / 1000):%Y-%m-%d %H:%M} - "
+                f"avg {mean:.1f}°C, min {low:.1f}°C, max {high:.1f}°C ({readings})"
+            )
+    return "\n".join(lines)
 
 # RESOURCE - Data that AI can access for context
+# Serialized status payloads, rebuilt only when the state version moves on
+_status_cache = {"version": None, "pretty": None, "compact": None}
+
+def serialize_status(pretty: bool = True) -> str:
+    """Return the device status JSON for the current version, serializing at most once"""
+    if _status_cache["version"] != DEVICES.version:
+        _status_cache.update(version=DEVICES.version, pretty=None, compact=None)
+    key = "pretty" if pretty else "compact"
+    payload = _status_cache[key]
+    if payload is None:
+        status = DEVICES.read_consistent(lambda: {
+            "version": DEVICES.version,
+            "devices": DEVICES.to_dict(),
+            "last_updated": DEVICES.updated_at.isoformat()
+        })
+        if not MULTI_WORKER:
+            status["recent_events"] = [format_event(e) for e in EVENT_LOG.last(5)]  # Last 5 events
+        payload = json.dumps(status, indent=2) if pretty else json.dumps(status, separators=(",", ":"))
+        _status_cache[key] = payload
+    return payload
+
 @mcp.resource("home://device_status")
 def get_device_status() -> str:
     """Get current status of all devices in JSON format"""
-    status = {
-        "devices": DEVICES,
-        "last_updated": datetime.now().isoformat(),
-        "recent_events": EVENT_LOG[-5:]  # Last 5 events
+    return serialize_status(pretty=True)
+
+@mcp.resource("home://device_status/compact")
+def get_device_status_compact() -> str:
+    """Get current status of all devices as compact (whitespace-free) JSON"""
+    return serialize_status(pretty=False)
+
+@mcp.resource("home://device_status/page/{cursor}")
+def get_device_status_page(cursor: str) -> str:
+    """Get one page of devices (HOME_DEVICE_PAGE_SIZE per page) as compact JSON.
+    Start with cursor "first", then follow "next" until it is null"""
+    try:
+        start = 0 if cursor == "first" else decode_cursor(cursor)
+    except ValueError as e:
+        return json.dumps({"error": str(e)})
+    def read():
+        rows, next_row = page_devices(start=start)
+        return DEVICES.version, {DEVICES.ids[row]: DEVICES.row_to_dict(row) for row in rows}, next_row
+
+    version, devices, next_row = DEVICES.read_consistent(read)
+    next_cursor = None if next_row is None else encode_cursor(next_row)
+    return json.dumps({
+        "version": version,
+        "devices": devices,
+        "next_cursor": next_cursor,
+        "next": None if next_cursor is None else f"home://device_status/page/{next_cursor}"
+    }, separators=(",", ":"), ensure_ascii=False)
+
+def events_since(version: int):
+    """Return events committed after `version` (oldest first), or None if some were evicted"""
+    events = []
+    for i in range(len(EVENT_LOG) - 1, -1, -1):
+        event = EVENT_LOG[i]
+        if event.version <= version:
+            return events[::-1]
+        events.append(event)
+    if len(EVENT_LOG) == EVENT_LOG.capacity:
+        return None
+    return events[::-1]
+
+@mcp.resource("home://device_status/since/{version}")
+def get_device_status_since(version: str) -> str:
+    """Get only the devices and events changed after the given state version, in JSON format.
+    Falls back to a full snapshot ("full": true) when that version is too old to diff against,
+    or newer than the server's own (it restarted without a snapshot, or is a different server)"""
+    try:
+        since = int(version)
+    except ValueError:
+        return json.dumps({"error": f"Invalid version: {version}"})
+
+    known = 1 <= since <= DEVICES.version
+    if MULTI_WORKER:
+        # Every row's modified version is shared, so only the events are left out
+        events = None
+        full = not known
+    else:
+        events = events_since(since) if known else None
+        full = events is None
+        if full:
+            events = EVENT_LOG.last(5)
+
+    def read():
+        if full:
+            devices = DEVICES.to_dict()
+        else:
+            devices = {DEVICES.ids[row]: DEVICES.row_to_dict(row) for row in DEVICES.changed_since(since)}
+        return DEVICES.version, DEVICES.updated_at, devices
+
+    current, updated_at, devices = DEVICES.read_consistent(read)
+    delta = {
+        "version": current,
+        "since": since,
+        "full": full,
+        "last_updated": updated_at.isoformat(),
+        "devices": devices
     }
-    return json.dumps(status, indent=2)
+    if events is not None:
+        delta["events"] = [format_event(e) for e in events]
+    return json.dumps(delta, indent=2)
+
+@mcp.resource("home://events/{device_id}")
+def get_device_events(device_id: str) -> str:
+    """Get the most recent events for one device in JSON format"""
+    if MULTI_WORKER:
+        return json.dumps({"error": "Event history is not available with several workers"})
+    # "Most recent" only: a device that is rarely used gets what the newest segment holds
+    events = find_events(device=device_id, limit=20, journal_segments=1)
+    return json.dumps({"device": device_id, "events": [format_event(e) for e in events]}, indent=2)
 
 # PROMPT - Template to guide AI interactions
 @mcp.prompt("home_status_report")
@@ -184,5 +1711,429 @@ def home_status_prompt() -> str:
 
 Make the report conversational and helpful, as if you're a smart home assistant."""
 
+# Snapshots - compact binary copies of the device columns for fast warm restarts
+SNAPSHOT_FILE = os.getenv(
+    "HOME_SNAPSHOT_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "home_state.snap")
+)
+SNAPSHOT_INTERVAL = float(os.getenv("HOME_SNAPSHOT_INTERVAL", "30"))
+SNAPSHOT_MAGIC = b"HOMESNAP"
+SNAPSHOT_SCHEMA = 1
+
+# magic, schema version, rows, state version, updated_at, digest of the device id list
+_SNAPSHOT_HEADER = struct.Struct("<8sHIQd32s")
+_SNAPSHOT_COLUMNS = (
+    ("modified", "Q"), ("temperature", "d"), ("target_temperature", "d"),
+    ("types", "B"), ("states", "B"), ("brightness", "B")
+)
+_ID_LENGTH = struct.Struct("<H")
+
+def device_ids_digest(store: DeviceStore) -> bytes:
+    return hashlib.blake2b("\0".join(store.ids).encode("utf-8"), digest_size=32).digest()
+
+# Devices are only ever appended, so the encoded id table only changes with the row count
+_snapshot_ids = {"rows": -1, "digest": b"", "table": b""}
+
+def _snapshot_id_table(ids: list):
+    if _snapshot_ids["rows"] != len(ids):
+        _snapshot_ids.update(
+            rows=len(ids),
+            digest=device_ids_digest(DEVICES),
+            table=b"".join(_ID_LENGTH.pack(len(raw)) + raw for raw in (i.encode("utf-8") for i in ids))
+        )
+    return _snapshot_ids["digest"], _snapshot_ids["table"]
+
+def take_snapshot(path: str = SNAPSHOT_FILE):
+    """Write the device store to `path` as a header, one fixed-width block per column and an id table"""
+    def read():
+        blocks = [bytes(getattr(DEVICES, name)) for name, _ in _SNAPSHOT_COLUMNS]
+        return DEVICES.version, DEVICES.updated_cell[0], blocks
+
+    # Copy the columns while no version can be published and outside any write section
+    # (a scene applies its writes before logging), then write without holding anything
+    with EVENT_LOCK:
+        version, updated, blocks = DEVICES.read_consistent(read)
+        ids = DEVICES.ids[:len(blocks[-1])]
+
+    digest, id_table = _snapshot_id_table(ids)
+    header = _SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_SCHEMA, len(ids), version, updated, digest)
+    temp_path = f"{path}.{os.getpid()}.tmp"  # Several server processes may share one snapshot file
+    with open(temp_path, "wb") as f:
+        f.write(header)
+        for block in blocks:
+            f.write(block)
+        f.write(id_table)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    return version
+
+def snapshot_version(path: str = SNAPSHOT_FILE) -> Optional[int]:
+    """State version held by the snapshot at `path`, or None if there is none"""
+    try:
+        with open(path, "rb") as f:
+            header = f.read(_SNAPSHOT_HEADER.size)
+    except OSError:
+        return None
+    if len(header) < _SNAPSHOT_HEADER.size:
+        return None
+    magic, schema, _, version, _, _ = _SNAPSHOT_HEADER.unpack(header)
+    return version if magic == SNAPSHOT_MAGIC and schema == SNAPSHOT_SCHEMA else None
+
+def restore_snapshot(path: str = SNAPSHOT_FILE):
+    """Load device columns from a snapshot; returns its state version, or None if there is none"""
+    if not os.path.exists(path) or os.path.getsize(path) < _SNAPSHOT_HEADER.size:
+        return None
+    with open(path, "rb") as f:
+        view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        magic, schema, rows, version, updated, digest = _SNAPSHOT_HEADER.unpack_from(view, 0)
+        if magic != SNAPSHOT_MAGIC or schema != SNAPSHOT_SCHEMA:
+            print(f"⚠️ Ignoring snapshot {path}: unknown format", file=sys.stderr)
+            return None
+
+        offset = _SNAPSHOT_HEADER.size
+        columns = []
+        for name, code in _SNAPSHOT_COLUMNS:
+            column = array(code)
+            column.frombytes(view[offset:offset + rows * column.itemsize])
+            columns.append((name, column))
+            offset += rows * column.itemsize
+
+        if rows == len(DEVICES) and digest == device_ids_digest(DEVICES):
+            # Same devices in the same order: every column is a single copy
+            for name, column in columns:
+                getattr(DEVICES, name)[:] = column
+        else:
+            # The device list changed; match rows by id and skip devices that no longer fit
+            for old_row in range(rows):
+                (length,) = _ID_LENGTH.unpack_from(view, offset)
+                device_id = view[offset + 2:offset + 2 + length].decode("utf-8")
+                offset += 2 + length
+                row = DEVICES.index.get(device_id)
+                if row is None or DEVICES.types[row] != columns[3][1][old_row]:
+                    continue
+                for name, column in columns:
+                    getattr(DEVICES, name)[row] = column[old_row]
+    finally:
+        view.close()
+
+    DEVICES.version_cell[0] = version
+    DEVICES.updated_cell[0] = updated
+    return version
+
+def replay_journal(since_version: int) -> int:
+    """Re-apply journaled device settings newer than `since_version`, reading only the journal tail"""
+    if EVENT_JOURNAL is None:
+        return 0
+    journals = [EVENT_JOURNAL] + [
+        EventJournal(os.path.join(EVENT_JOURNAL.directory, name))
+        for name in sorted(os.listdir(EVENT_JOURNAL.directory)) if name.startswith("worker-")
+    ]
+    tail = []
+    for journal in journals:
+        for path in reversed(journal.segments):
+            records = list(journal.read_segment(path))
+            newer = [r for r in records if r.get("version", 0) > since_version]
+            tail.extend(newer)
+            if len(newer) < len(records):
+                break  # This segment reaches back past the snapshot
+    tail.sort(key=lambda r: r["version"])
+
+    for record in tail:
+        if "fields" in record and record["device_id"] in DEVICES:
+            try:
+                DEVICES.apply_writes(DEVICES.compile_writes(record["device_id"], record["fields"]))
+            except (KeyError, ValueError):
+                continue
+    if tail:
+        DEVICES.version_cell[0] = max(DEVICES.version, tail[-1]["version"])
+        # Older journals stored epoch milliseconds in "timestamp"
+        last = tail[-1]
+        DEVICES.updated_cell[0] = last["ns"] / 1e9 if "ns" in last else last["timestamp"] / 1000
+    return len(tail)
+
+def warm_start():
+    """Restore the latest snapshot plus the journal tail, reporting how long it took"""
+    started = time.perf_counter()
+    version = restore_snapshot()
+    if version is None:
+        return
+    replayed = replay_journal(version)
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"♻️ Restored {len(DEVICES)} devices from snapshot v{version} "
+          f"+ {replayed} journal event(s) in {elapsed:.1f} ms", file=sys.stderr)
+
+def start_snapshots(interval: float = SNAPSHOT_INTERVAL):
+    """Snapshot in a background thread whenever the state changed, and once more at exit"""
+    if interval <= 0:
+        return
+    stop = threading.Event()
+    last = {"version": DEVICES.version}
+
+    def snapshot_if_changed():
+        if DEVICES.version != last["version"]:
+            last["version"] = take_snapshot()
+
+    def loop():
+        while not stop.wait(interval):
+            snapshot_if_changed()
+
+    threading.Thread(target=loop, name="snapshots", daemon=True).start()
+    atexit.register(lambda: (stop.set(), snapshot_if_changed()))
+
+# Thermal simulation - every thermostat advanced together in one vectorized step
+THERMAL_TICK_SECONDS = float(os.getenv("HOME_THERMAL_TICK", "1.0"))
+HEATING_RATE = float(os.getenv("HOME_HEATING_RATE", "0.5"))            # °C per minute the HVAC can move
+AMBIENT_TEMPERATURE = float(os.getenv("HOME_AMBIENT_TEMPERATURE", "18.0"))
+HEAT_LOSS = 0.02  # Share of the gap to ambient lost per minute
+SETTLED_STEP = 1e-6  # °C; below this nothing is written until the state changes again
+
+
+class ThermalModel:
+    """Per-thermostat heating rate and ambient temperature, stepped with NumPy over the store columns"""
+
+    def __init__(self, store):
+        self.store = store
+        self.device_count = -1
+        self.settled_version = None
+
+    def _thermostats(self):
+        """Rows of all thermostats, refreshed only when devices are added"""
+        if self.device_count != len(self.store):
+            self.device_count = len(self.store)
+            types = np.frombuffer(self.store.types, dtype=np.uint8)
+            self.rows = np.flatnonzero(types == _TYPE_CODES["thermostat"])
+            self.ids = [self.store.ids[row] for row in self.rows.tolist()]
+            self.rate = np.full(len(self.rows), HEATING_RATE)
+            self.ambient = np.full(len(self.rows), AMBIENT_TEMPERATURE)
+            del types  # Release the buffer so the store can grow again
+        return self.rows
+
+    def step(self, seconds: float) -> int:
+        """Advance every thermostat by `seconds`; returns how many moved"""
+        store = self.store
+        if self.settled_version == store.version:
+            return 0  # Idle: nothing changed since everything settled
+        rows = self._thermostats()
+        if not len(rows):
+            return 0
+
+        minutes = seconds / 60
+        temperature = np.frombuffer(store.temperature, dtype=np.float64)
+        target = np.frombuffer(store.target_temperature, dtype=np.float64)
+        current = temperature[rows]
+        limit = self.rate * minutes
+        change = np.clip(target[rows] - current, -limit, limit)
+        change += HEAT_LOSS * minutes * (self.ambient - current)
+        moved = np.abs(change) > SETTLED_STEP
+
+        count = int(moved.sum())
+        if count:
+            modified = np.frombuffer(store.modified, dtype=np.uint64)
+            with EVENT_LOCK, store.writing():
+                temperature[rows] = current + change
+                modified[rows[moved]] = store.version + 1
+                self.settled_version = None
+                store.commit()
+            del modified
+        else:
+            self.settled_version = store.version
+        del temperature, target
+        return count
+
+    def sample(self, history: "TemperatureHistory"):
+        """Record the current reading of every thermostat in the temperature history"""
+        rows = self._thermostats()
+        temperature = np.frombuffer(self.store.temperature, dtype=np.float64)
+        values = temperature[rows].tolist()
+        del temperature
+        with EVENT_LOCK:
+            history.record_many(self.ids, values, event_clock_ns() // 1_000_000)
+
+
+async def run_thermal_simulation(tick: float = THERMAL_TICK_SECONDS):
+    """Background loop advancing all thermostats every `tick` seconds"""
+    if tick <= 0:
+        return
+    model = ThermalModel(DEVICES)
+    last = last_sample = time.monotonic()
+    model.sample(TEMPERATURE_HISTORY)
+    while True:
+        await asyncio.sleep(tick)
+        now = time.monotonic()
+        if model.step(now - last):
+            schedule_resource_updates()
+        last = now
+        if now - last_sample >= TEMPERATURE_SAMPLE_SECONDS:
+            model.sample(TEMPERATURE_HISTORY)
+            last_sample = now
+
+async def serve_with_simulation(server, simulate: bool = True):
+    """Await a server coroutine with the thermal simulation running beside it"""
+    simulation = asyncio.create_task(run_thermal_simulation()) if simulate else None
+    try:
+        await server
+    finally:
+        if simulation is not None:
+            simulation.cancel()
+
+# Multi-process mode - HTTP workers sharing the device columns through shared memory
+_SHARED_COLUMNS = (
+    ("version_cell", "Q"), ("updated_cell", "d"), ("seq_cell", "Q"), ("modified", "Q"),
+    ("temperature", "d"), ("target_temperature", "d"),
+    ("types", "B"), ("states", "B"), ("brightness", "B")
+)
+
+def shared_layout(rows: int):
+    """Byte offset of each column in the shared block, and the block size"""
+    offsets, offset = {}, 0
+    for name, code in _SHARED_COLUMNS:
+        offset = (offset + 7) // 8 * 8  # Keep every column 8-byte aligned
+        offsets[name] = offset
+        offset += (1 if name.endswith("_cell") else rows) * struct.calcsize(code)
+    return offsets, offset
+
+def share_device_store(store: DeviceStore, shm: shared_memory.SharedMemory, copy: bool):
+    """Rebind the store's columns to views of the shared block, optionally copying the current values in.
+
+    The device list itself (ids, names, index) is not shared: every process builds the
+    same rows at import, so only the fixed-width columns need to live in shared memory.
+    """
+    offsets, _ = shared_layout(len(store))
+    for name, code in _SHARED_COLUMNS:
+        column = getattr(store, name)
+        size = len(column) * struct.calcsize(code)
+        view = shm.buf[offsets[name]:offsets[name] + size].cast(code)
+        if copy:
+            view[:] = column
+        setattr(store, name, view)
+    # Scenes hold references to the columns they write, so compile them again
+    for name, scene in list(SCENES.items()):
+        add_scene(name, scene)
+
+def release_shared_store(store: DeviceStore):
+    """Copy the shared columns back into private arrays so the block can be closed"""
+    for name, code in _SHARED_COLUMNS:
+        view = getattr(store, name)
+        setattr(store, name, array(code, view))
+        view.release()
+    for name, scene in list(SCENES.items()):
+        add_scene(name, scene)
+
+def run_worker(index: int, shm_name: str, locks: list, seq_lock, event_lock, sockets: list):
+    """Entry point of one worker process: attach to the shared state and serve HTTP"""
+    global EVENT_LOCK, EVENT_JOURNAL, MULTI_WORKER
+    import uvicorn
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    share_device_store(DEVICES, shm, copy=False)
+    DEVICES.locks = locks
+    DEVICES.seq_lock = seq_lock
+    EVENT_LOCK = event_lock
+
+    # Their answers would depend on which worker took the request, so these are not offered
+    MULTI_WORKER = True
+    for name in ("define_scene", "query_events", "temperature_history"):
+        mcp.remove_tool(name)
+    if EVENT_JOURNAL is not None:
+        EVENT_JOURNAL = EventJournal(os.path.join(EVENT_JOURNAL.directory, f"worker-{index}"))
+        atexit.register(EVENT_JOURNAL.close)
+
+    if index == 0:
+        start_snapshots()
+
+    # Any worker may receive any request, so sessions cannot be kept per process
+    mcp.settings.stateless_http = True
+    mcp.settings.json_response = True
+    config = uvicorn.Config(mcp.streamable_http_app(), log_level="warning")
+    try:
+        # Only one worker advances the shared thermostats
+        asyncio.run(serve_with_simulation(uvicorn.Server(config).serve(sockets=sockets), simulate=index == 0))
+    finally:
+        release_shared_store(DEVICES)
+        shm.close()
+
+def run_workers(args):
+    """Serve streamable HTTP from args.workers processes sharing one device store"""
+    import uvicorn
+
+    warm_start()
+    # Bind first: if the port is taken there is no shared block to clean up
+    sock = uvicorn.Config(None, host=args.host, port=args.port).bind_socket()
+    _, size = shared_layout(len(DEVICES))
+    shm = shared_memory.SharedMemory(create=True, size=size)
+    share_device_store(DEVICES, shm, copy=True)
+
+    context = multiprocessing.get_context("spawn")
+    locks = [context.Lock() for _ in range(LOCK_STRIPES)]
+    seq_lock = context.Lock()
+    event_lock = context.Lock()
+
+    workers = [
+        context.Process(target=run_worker, args=(i, shm.name, locks, seq_lock, event_lock, [sock]))
+        for i in range(args.workers)
+    ]
+    # A service manager stops the parent with SIGTERM; exit through the finally so the workers go too
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: sys.exit(0))
+    try:
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    finally:
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        started = [worker for worker in workers if worker.pid is not None]
+        for worker in started:
+            if worker.is_alive():
+                worker.terminate()
+        for worker in started:
+            worker.join()
+        sock.close()
+        release_shared_store(DEVICES)
+        shm.close()
+        shm.unlink()
+
+def parse_args():
+    """Command line options; each defaults to its environment variable"""
+    parser = argparse.ArgumentParser(description="Home Automation MCP server")
+    parser.add_argument(
+        "--transport", choices=["stdio", "streamable-http", "sse"],
+        default=os.getenv("HOME_MCP_TRANSPORT", "stdio"),
+        help="stdio serves one client; streamable-http/sse serve many clients from one shared device store"
+    )
+    parser.add_argument("--host", default=os.getenv("HOME_MCP_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("HOME_MCP_PORT", "8000")))
+    parser.add_argument(
+        "--session-timeout", type=float, default=float(os.getenv("HOME_MCP_SESSION_TIMEOUT", "1800")),
+        help="Seconds an idle HTTP session is kept alive"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=int(os.getenv("HOME_MCP_WORKERS", "1")),
+        help="Worker processes for streamable-http, sharing device state through shared memory"
+    )
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    mcp.run()
\ No newline at end of file
+    args = parse_args()
+    if args.transport != "stdio":
+        mcp.settings.host = args.host
+        mcp.settings.port = args.port
+        mcp.settings.session_idle_timeout = args.session_timeout
+        path = mcp.settings.streamable_http_path if args.transport == "streamable-http" else mcp.settings.sse_path
+        print(f"🏠 Home Automation MCP server listening on http://{args.host}:{args.port}{path}", file=sys.stderr)
+    if args.workers > 1:
+        if args.transport != "streamable-http":
+            sys.exit("❌ --workers requires --transport streamable-http")
+        run_workers(args)
+    else:
+        warm_start()
+        start_snapshots()
+        runners = {
+            "stdio": mcp.run_stdio_async,
+            "sse": mcp.run_sse_async,
+            "streamable-http": mcp.run_streamable_http_async
+        }
+        asyncio.run(serve_with_simulation(runners[args.transport]()))
\ No newline at end of file
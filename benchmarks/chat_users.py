@@ -0,0 +1,85 @@
+"""N simulated users chatting at once through the Gradio handlers, against a fake LLM with a fixed
+latency (benchmarks/fake_llm.py). Reports time to first token and total time per chat, and the wall
+time for all of them: with overlapping chats it stays close to one reply, not N.
+
+    python benchmarks/chat_users.py --users 1 10 100 --delay 1.0
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+import httpx
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # The client finds the server script relative to the working directory
+os.environ.update(MCP_SERVER_POOL_SIZE="0", AZURE_OPENAI_API_VERSION="2024-10-21", AZURE_OPENAI_API_DEPLOY="fake")
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))]
+
+
+async def chat(client, request, first, total):
+    started = time.perf_counter()
+    async for history, _, _ in client.gradio_chat_async("hi", [], request):
+        if not first.get(request.session_hash) and history[-1]["role"] == "assistant" and history[-1]["content"]:
+            first[request.session_hash] = time.perf_counter() - started
+    total.append(time.perf_counter() - started)
+    return history[-1]["content"]
+
+
+async def run(client, users):
+    requests = [SimpleNamespace(session_hash=f"user-{users}-{i}") for i in range(users)]
+    await asyncio.gather(*(client.gradio_initialise_llm(request) for request in requests))
+    first, total = {}, []
+    started = time.perf_counter()
+    replies = await asyncio.gather(*(chat(client, request, first, total) for request in requests))
+    elapsed = time.perf_counter() - started
+    failed = sum(not reply.startswith("word0") for reply in replies)
+    ttft = list(first.values()) or [float("nan")]
+    print(f"{users:>5} | {percentile(ttft, 0.5):6.2f} s | {percentile(ttft, 0.99):6.2f} s | "
+          f"{percentile(total, 0.5):6.2f} s | {percentile(total, 0.99):6.2f} s | {elapsed:6.2f} s | {failed}")
+    for request in requests:
+        await client.gradio_end_session(request)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--delay", type=float, default=1.0, help="Seconds the fake LLM takes per reply")
+    parser.add_argument("--port", type=int, default=8700)
+    args = parser.parse_args()
+
+    llm = subprocess.Popen([sys.executable, os.path.join(ROOT, "benchmarks", "fake_llm.py"),
+                            "--port", str(args.port), "--delay", str(args.delay)])
+    try:
+        for _ in range(50):
+            try:
+                httpx.get(f"http://127.0.0.1:{args.port}/", timeout=1)
+                break
+            except httpx.TransportError:
+                time.sleep(0.2)
+
+        import MCPClient_GradioUI as client
+        from openai import AsyncAzureOpenAI
+        client.aoai_client = AsyncAzureOpenAI(api_version="2024-10-21", azure_endpoint=f"http://127.0.0.1:{args.port}",
+                                              api_key="fake", max_retries=0)
+
+        print(f"fake LLM: {args.delay:.1f} s per reply")
+        print(f"{'users':>5} | {'TTFT p50':>8} | {'TTFT p99':>8} | {'total p50':>9} | {'total p99':>9} | {'wall':>8} | failed")
+        for users in args.users:
+            asyncio.run(run(client, users))
+        client.shutdown()
+    finally:
+        llm.terminate()
+        llm.wait(10)
+
+
+if __name__ == "__main__":
+    main()
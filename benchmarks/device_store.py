@@ -0,0 +1,77 @@
+"""Bytes per device and lookups per second of the DeviceStore against the original dict of dicts,
+at 10k, 100k and 1M devices.
+
+Each lookup reads one field of a device: from its dict, straight from the store's columns by row
+number (as the tools do), or through the dict-like Device view kept for convenience.
+
+    python benchmarks/device_store.py
+"""
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.update(HOME_EVENT_JOURNAL_DIR="", HOME_SNAPSHOT_INTERVAL="0", HOME_THERMAL_TICK="0")
+
+from MCPServer_HomeAutomation import DEVICE_TYPES, DeviceStore
+
+KINDS = (
+    ("light", {"state": "off", "brightness": 50}),
+    ("thermostat", {"temperature": 22.0, "target_temperature": 22.0}),
+    ("lock", {"state": "locked"})
+)
+LOOKUPS = 200_000
+
+
+def build_dicts(count):
+    devices = {}
+    for i in range(count):
+        device_type, fields = KINDS[i % 3]
+        devices[f"dev_{i}"] = {"name": f"Device {i}", "type": device_type, **fields}
+    return devices
+
+
+def build_store(count):
+    store = DeviceStore()
+    for i in range(count):
+        device_type, fields = KINDS[i % 3]
+        store.add(f"dev_{i}", f"Device {i}", device_type, **fields)
+    return store
+
+
+def measured(build, count):
+    """Build the registry and return it with the bytes it holds per device"""
+    tracemalloc.start()
+    registry = build(count)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return registry, size / count
+
+
+def rate(lookup, keys):
+    started = time.perf_counter()
+    for key in keys:
+        lookup(key)
+    return len(keys) / (time.perf_counter() - started)
+
+
+def main():
+    print(f"{'devices':>9} | {'registry':14} | {'bytes/device':>12} | {'lookups/s':>11}")
+    for count in (10_000, 100_000, 1_000_000):
+        keys = [f"dev_{random.randrange(count)}" for _ in range(LOOKUPS)]
+
+        devices, size = measured(build_dicts, count)
+        print(f"{count:>9,} | {'dict of dicts':14} | {size:>12.1f} | {rate(lambda k: devices[k]['type'], keys):>11,.0f}")
+        del devices
+
+        store, size = measured(build_store, count)
+        index, types = store.index, store.types
+        print(f"{count:>9,} | {'DeviceStore':14} | {size:>12.1f} | {rate(lambda k: DEVICE_TYPES[types[index[k]]], keys):>11,.0f}")
+        print(f"{count:>9,} | {'  Device view':14} | {'':>12} | {rate(lambda k: store[k]['type'], keys):>11,.0f}")
+        del store
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Event ingest rate of the ring buffer EventLog against the old list with pop(0), per capacity.
+
+Both logs are filled to capacity first, so every timed append also evicts the oldest event.
+
+    python benchmarks/event_log.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.update(HOME_EVENT_JOURNAL_DIR="", HOME_SNAPSHOT_INTERVAL="0", HOME_THERMAL_TICK="0")
+
+from MCPServer_HomeAutomation import EventLog
+
+
+def list_ingest(capacity, events):
+    """The original log: append a dict, then drop the oldest once over capacity"""
+    event = {"timestamp": "2026-01-01 00:00:00", "device": "Living Room Light", "action": "Light turned on at 50%"}
+    log = [event] * capacity
+    started = time.perf_counter()
+    for _ in range(events):
+        log.append(event)
+        if len(log) > capacity:
+            log.pop(0)
+    return events / (time.perf_counter() - started)
+
+
+def ring_ingest(capacity, events):
+    log = EventLog(capacity)
+    args = ("on", 50)
+    for i in range(capacity):
+        log.append(i, i, 0, 0, args)
+    started = time.perf_counter()
+    for i in range(capacity, capacity + events):
+        log.append(i, i, 0, 0, args)
+    rate = events / (time.perf_counter() - started)
+
+    # Reads the status resources and query_events rely on
+    started = time.perf_counter()
+    for _ in range(10_000):
+        log.last(5)
+    last = (time.perf_counter() - started) / 10_000
+    started = time.perf_counter()
+    for i in range(10_000):
+        log.span(events + capacity // 2, events + capacity * 3 // 4)
+    span = (time.perf_counter() - started) / 10_000
+    return rate, last, span
+
+
+def main():
+    print(f"{'capacity':>9} | {'list.pop(0)/s':>13} | {'ring/s':>11} | {'last(5)':>8} | {'span':>8}")
+    for capacity in (10, 10_000, 1_000_000):
+        old = list_ingest(capacity, 20_000)
+        new, last, span = ring_ingest(capacity, 300_000)
+        print(f"{capacity:>9,} | {old:>13,.0f} | {new:>11,.0f} | {last * 1e6:>5.2f} us | {span * 1e6:>5.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Stand-in for the Azure OpenAI chat completions endpoint with a fixed latency, so the client
+benchmarks measure the client rather than the model.
+
+Replies stream `--tokens` words: the first after 30% of `--delay` seconds, the rest spread over
+the remaining 70%. A user message mentioning "devices" gets a list_devices tool call first when
+the request offers tools.
+
+    python benchmarks/fake_llm.py --port 8700 --delay 1.0
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+
+def chunk(delta, finish_reason=None, **extra):
+    body = {"id": "fake", "object": "chat.completion.chunk", "created": int(time.time()), "model": "fake",
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}], **extra}
+    return f"data: {json.dumps(body)}\n\n"
+
+
+def make_app(delay, tokens):
+    async def tool_call():
+        await asyncio.sleep(delay * 0.3)
+        call = {"index": 0, "id": "call_1", "type": "function", "function": {"name": "list_devices", "arguments": "{}"}}
+        yield chunk({"role": "assistant", "tool_calls": [call]})
+        yield chunk({}, "tool_calls")
+        yield "data: [DONE]\n\n"
+
+    async def reply():
+        await asyncio.sleep(delay * 0.3)  # Time to first token
+        for i in range(tokens):
+            delta = {"content": ("" if i == 0 else " ") + f"word{i}"}
+            if i == 0:
+                delta["role"] = "assistant"
+            yield chunk(delta)
+            await asyncio.sleep(delay * 0.7 / tokens)
+        usage = {"prompt_tokens": 10, "completion_tokens": tokens, "total_tokens": 10 + tokens}
+        yield chunk({}, "stop", usage=usage)
+        yield "data: [DONE]\n\n"
+
+    async def chat(request):
+        body = await request.json()
+        last = body["messages"][-1]
+        if not body.get("stream"):
+            await asyncio.sleep(delay)
+            text = " ".join(f"word{i}" for i in range(tokens))
+            return JSONResponse({"id": "fake", "object": "chat.completion", "created": int(time.time()), "model": "fake",
+                                 "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                                 "usage": {"prompt_tokens": 10, "completion_tokens": tokens, "total_tokens": 10 + tokens}})
+        wants_tool = body.get("tools") and last["role"] == "user" and "devices" in str(last["content"])
+        return StreamingResponse(tool_call() if wants_tool else reply(), media_type="text/event-stream")
+
+    return Starlette(routes=[Route("/openai/deployments/{deployment}/chat/completions", chat, methods=["POST"])])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8700)
+    parser.add_argument("--delay", type=float, default=1.0, help="Seconds per reply")
+    parser.add_argument("--tokens", type=int, default=20, help="Words per reply")
+    args = parser.parse_args()
+    uvicorn.run(make_app(args.delay, args.tokens), host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Tokens and serialization time per 1k devices for each list_devices format, and for the
+original string built with +=.
+
+Tokens are estimated with a GPT-style pre-tokenizer (words, digit groups of up to three,
+punctuation runs, two tokens per emoji), which tracks real tokenizers closely enough to compare formats.
+
+    python benchmarks/list_devices_formats.py --devices 10000
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.update(HOME_EVENT_JOURNAL_DIR="", HOME_SNAPSHOT_INTERVAL="0", HOME_THERMAL_TICK="0")
+
+import MCPServer_HomeAutomation as server
+
+TOKEN = re.compile(r"[A-Za-z]+|\d{1,3}|\s+(?=\S)|\s+|[^\sA-Za-z\d]+")
+
+
+def tokens(text):
+    return sum(2 if ord(match.group()[0]) > 0x2000 else 1 for match in TOKEN.finditer(text))
+
+
+def legacy():
+    """list_devices as it was: one += per line"""
+    result = "📱 Home Devices Status:\n\n"
+    for device_id, device in server.DEVICES.items():
+        result += f"🔹 {device['name']} ({device_id})\n"
+        if device['type'] == 'light':
+            result += f"   State: {device['state']}\n"
+            result += f"   Brightness: {device['brightness']}%\n"
+        elif device['type'] == 'thermostat':
+            result += f"   Current: {device['temperature']}°C\n"
+            result += f"   Target: {device['target_temperature']}°C\n"
+        elif device['type'] == 'lock':
+            result += f"   State: {device['state']}\n"
+        result += "\n"
+    return result
+
+
+def text_of(result):
+    return result.content[0].text
+
+
+def add_devices(count):
+    devices = server.DEVICES
+    for i in range(len(devices), count):
+        kind = i % 3
+        if kind == 0:
+            devices.add(f"light_{i}", f"Light {i}", "light", state="on" if i % 2 else "off", brightness=i % 101)
+        elif kind == 1:
+            devices.add(f"thermostat_{i}", f"Thermostat {i}", "thermostat",
+                        temperature=20.0 + i % 7 / 3, target_temperature=21.5)
+        else:
+            devices.add(f"lock_{i}", f"Lock {i}", "lock", state="locked")
+    devices.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    add_devices(args.devices)
+    count = len(server.DEVICES)
+    formats = (
+        ("legacy +=", legacy),
+        ("text", lambda: text_of(server.list_devices("text"))),
+        ("table", lambda: text_of(server.list_devices("table"))),
+        ("json", lambda: text_of(server.list_devices("json")))
+    )
+    print(f"{count:,} devices; per 1k devices:")
+    print(f"  {'format':10} | {'time':>9} | {'tokens':>7} | {'size':>8}")
+    for label, render in formats:
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            output = render()
+        elapsed = (time.perf_counter() - started) / args.repeat
+        per_k = 1000 / count
+        print(f"  {label:10} | {elapsed * per_k * 1e3:6.2f} ms | {tokens(output) * per_k:7.0f} | "
+              f"{len(output.encode()) * per_k / 1024:5.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Fire 10k concurrent toggles at the living room light and check that none were lost.
+
+An even number of toggles must leave the light as it started, every toggle must publish its own
+version, and the event log must show the light alternating on and off in version order.
+
+    python benchmarks/stress_toggles.py                 # threads calling the tool in one process
+    python benchmarks/stress_toggles.py --workers 4     # HTTP clients against 4 worker processes
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.update(HOME_EVENT_JOURNAL_DIR="", HOME_SNAPSHOT_INTERVAL="0", HOME_THERMAL_TICK="0")
+
+from workers import HEADERS, SERVER, initialize, rpc, wait_until_up
+
+
+def check(label, ok):
+    print(f"{'✅' if ok else '❌'} {label}")
+    return ok
+
+
+def stress_threads(toggles, threads):
+    os.environ["HOME_EVENT_LOG_CAPACITY"] = str(toggles)
+    import MCPServer_HomeAutomation as server
+
+    sys.setswitchinterval(1e-6)  # Switch threads as often as possible to shake out races
+    devices = server.DEVICES
+    light = devices.index["living_room_light"]
+    before, version = devices.get_field(light, "state"), devices.version
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        results = list(pool.map(lambda _: server.control_light("toggle"), range(toggles)))
+    elapsed = time.perf_counter() - started
+    print(f"{toggles:,} toggles from {threads} threads in {elapsed:.2f} s ({toggles / elapsed:,.0f}/s)")
+
+    states = [event.args[0] for event in server.EVENT_LOG if event.subject == light]
+    versions = [event.version for event in server.EVENT_LOG]
+    ons = sum(result.structuredContent["state"] == "on" for result in results)
+    passed = [
+        check(f"final state {devices.get_field(light, 'state')} (expected {before})",
+              devices.get_field(light, "state") == before),
+        check(f"{ons:,} toggles reported on (expected {toggles // 2:,})", ons == toggles // 2),
+        check(f"version moved on by {devices.version - version:,} (expected {toggles:,})",
+              devices.version - version == toggles),
+        check("event versions unique and in order", versions == sorted(set(versions))),
+        check("events alternate on/off", all(a != b for a, b in zip(states, states[1:])))
+    ]
+    return all(passed)
+
+
+def toggle_over_http(url, toggles, barrier):
+    with httpx.Client(headers=HEADERS, timeout=60) as client:
+        initialize(client, url)
+        barrier.wait(60)
+        for i in range(toggles):
+            result = rpc(client, url, "tools/call", {"name": "control_light", "arguments": {"action": "toggle"}}, i + 1)
+            if "error" in result or result["result"].get("isError"):
+                raise RuntimeError(result)
+
+
+def stress_workers(toggles, workers, clients, port):
+    url = f"http://127.0.0.1:{port}/mcp"
+    server = subprocess.Popen(
+        [sys.executable, SERVER, "--transport", "streamable-http", "--port", str(port), "--workers", str(workers)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_up(url, server)
+        with httpx.Client(headers=HEADERS) as client:
+            initialize(client, url)
+
+            def status():
+                result = rpc(client, url, "resources/read", {"uri": "home://device_status/compact"})
+                return json.loads(result["result"]["contents"][0]["text"])
+            before = status()
+
+            started = time.perf_counter()
+            with multiprocessing.Manager() as manager:
+                barrier = manager.Barrier(clients)
+                with multiprocessing.Pool(clients) as pool:
+                    pool.starmap(toggle_over_http, [(url, toggles // clients, barrier)] * clients)
+            elapsed = time.perf_counter() - started
+            sent = toggles // clients * clients
+            print(f"{sent:,} toggles from {clients} clients to {workers} workers in {elapsed:.2f} s ({sent / elapsed:,.0f}/s)")
+
+            after = status()
+            expected = before["devices"]["living_room_light"]["state"]
+            if sent % 2:
+                expected = "on" if expected == "off" else "off"
+            state = after["devices"]["living_room_light"]["state"]
+            passed = [
+                check(f"final state {state} (expected {expected})", state == expected),
+                check(f"version moved on by {after['version'] - before['version']:,} (expected {sent:,})",
+                      after["version"] - before["version"] == sent)
+            ]
+    finally:
+        server.terminate()
+        server.wait(10)
+    return all(passed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--toggles", type=int, default=10_000)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=0, help="Serve over HTTP with this many workers")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    if args.workers:
+        passed = stress_workers(args.toggles, args.workers, args.clients, args.port)
+    else:
+        passed = stress_threads(args.toggles, args.threads)
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
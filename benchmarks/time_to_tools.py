@@ -0,0 +1,70 @@
+"""p50/p99 time from "Start MCP Server" until the agent can list the server's tools, with and
+without the warm server pool. Each run starts and stops the server of one session repeatedly.
+
+    python benchmarks/time_to_tools.py --pool 0 1 --cycles 50
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))]
+
+
+async def cycles(client, count):
+    request = SimpleNamespace(session_hash="bench")
+    await client.gradio_initialise_llm(request)
+    times = []
+    for _ in range(count):
+        started = time.perf_counter()
+        await client.gradio_start_server(request)
+        session = await client.run_in_agent_loop(client.get_session(request))
+        await client.run_in_agent_loop(session.connection.server.list_tools())
+        times.append(time.perf_counter() - started)
+        await client.gradio_stop_server(request)
+    return times
+
+
+def measure(count):
+    """Run in a child process per pool size, since the client reads MCP_SERVER_POOL_SIZE at import"""
+    # The agent is created but never asked anything, so the endpoint need not exist
+    for name, value in (("AZURE_OPENAI_API_BASE", "http://127.0.0.1"), ("AZURE_OPENAI_API_VERSION", "2024-10-21"),
+                        ("AZURE_OPENAI_API_DEPLOY", "unused")):
+        os.environ.setdefault(name, value)
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)  # The client finds the server script relative to the working directory
+    import MCPClient_GradioUI as client
+    times = asyncio.run(cycles(client, count))
+    client.shutdown()
+    print(f"{client.MCP_SERVER_POOL_SIZE:>4} | {percentile(times, 0.5) * 1e3:8.1f} ms | {percentile(times, 0.99) * 1e3:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pool", type=int, nargs="+", default=[0, 1], help="MCP_SERVER_POOL_SIZE values to compare")
+    parser.add_argument("--cycles", type=int, default=50)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        measure(args.cycles)
+        return
+
+    print(f"{'pool':>4} | {'p50':>11} | {'p99':>11}")
+    for size in args.pool:
+        # No snapshots or journal, so the servers leave nothing behind in the repo
+        env = dict(os.environ, MCP_SERVER_POOL_SIZE=str(size),
+                   HOME_EVENT_JOURNAL_DIR="", HOME_SNAPSHOT_INTERVAL="0", HOME_THERMAL_TICK="0")
+        subprocess.run([sys.executable, os.path.abspath(__file__), "--child", "--cycles", str(args.cycles)],
+                       env=env, stderr=subprocess.DEVNULL, check=True)
+
+
+if __name__ == "__main__":
+    main()
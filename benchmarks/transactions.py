@@ -0,0 +1,58 @@
+"""Cost of transactions and the seqlock: single-device tools, scenes with and without a
+transaction, and consistent against plain reads of the whole store.
+
+    python benchmarks/transactions.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.update(HOME_EVENT_JOURNAL_DIR="", HOME_SNAPSHOT_INTERVAL="0", HOME_THERMAL_TICK="0")
+
+import MCPServer_HomeAutomation as server
+
+CALLS = 50_000
+
+
+def per_call(function):
+    started = time.perf_counter()
+    for _ in range(CALLS):
+        function()
+    return (time.perf_counter() - started) / CALLS * 1e6
+
+
+def main():
+    devices = server.DEVICES
+    light = devices.index["living_room_light"]
+    writes = server.COMPILED_SCENES["evening"]
+
+    def raw_write():
+        devices.brightness[light] = 60
+
+    def field_write():
+        devices.set_field(light, "brightness", 60)
+
+    def scene_direct():
+        devices.apply_writes(writes)
+
+    def scene_transaction():
+        txn = devices.transaction()
+        txn.stage(writes)
+        txn.commit()
+
+    print("single-device tools (write section, lock, event)")
+    print(f"  control_light       {per_call(lambda: server.control_light('toggle')):7.2f} us/call")
+    print(f"  control_door_lock   {per_call(lambda: server.control_door_lock('lock')):7.2f} us/call")
+    print(f"  column write        {per_call(raw_write):7.2f} us")
+    print(f"  set_field           {per_call(field_write):7.2f} us (inside a write section)")
+    print("scene writes")
+    print(f"  apply_writes        {per_call(scene_direct):7.2f} us")
+    print(f"  transaction         {per_call(scene_transaction):7.2f} us")
+    print("whole-store reads")
+    print(f"  to_dict             {per_call(devices.to_dict):7.2f} us")
+    print(f"  read_consistent     {per_call(lambda: devices.read_consistent(devices.to_dict)):7.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Throughput of list_devices and control_light against the streamable-http server with 1, 2, 4... workers.
+
+Each client process keeps one HTTP connection and sends its calls back to back, so with enough
+clients the server is the bottleneck. Scaling is bounded by the number of CPU cores.
+
+    python benchmarks/workers.py --workers 1 2 4 --clients 16 --calls 200
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "MCPServer_HomeAutomation.py")
+HEADERS = {"Accept": "application/json, text/event-stream", "Content-Type": "application/json"}
+
+
+def rpc(client, url, method, params=None, request_id=1):
+    """POST one JSON-RPC message and return the decoded result (JSON or a single SSE event)"""
+    message = {"jsonrpc": "2.0", "method": method, "params": params or {}}
+    if request_id is not None:
+        message["id"] = request_id
+    response = client.post(url, json=message)
+    response.raise_for_status()
+    if request_id is None:
+        return None
+    if response.headers.get("content-type", "").startswith("text/event-stream"):
+        data = next(line[6:] for line in response.text.splitlines() if line.startswith("data: "))
+        return json.loads(data)
+    return response.json()
+
+
+def initialize(client, url):
+    """MCP handshake; the single-process server keeps a session, which later requests must name"""
+    init = client.post(url, json={"jsonrpc": "2.0", "id": 0, "method": "initialize", "params": {
+        "protocolVersion": "2025-03-26", "capabilities": {}, "clientInfo": {"name": "bench", "version": "1"}}})
+    init.raise_for_status()
+    session = init.headers.get("mcp-session-id")
+    if session:
+        client.headers["mcp-session-id"] = session
+    rpc(client, url, "notifications/initialized", request_id=None)
+
+
+def run_client(url, tool, arguments, calls, barrier):
+    with httpx.Client(headers=HEADERS, timeout=60) as client:
+        initialize(client, url)
+        barrier.wait(60)
+        started = time.perf_counter()
+        for i in range(calls):
+            result = rpc(client, url, "tools/call", {"name": tool, "arguments": arguments}, request_id=i + 1)
+            if "error" in result:
+                raise RuntimeError(result["error"])
+        return started, time.perf_counter()
+
+
+def wait_until_up(url, server, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("server exited; is the port already in use?")
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def measure(url, tool, arguments, clients, calls):
+    """Calls per second across all clients, from the first start to the last finish"""
+    with multiprocessing.Manager() as manager:
+        barrier = manager.Barrier(clients)
+        with multiprocessing.Pool(clients) as pool:
+            spans = pool.starmap(run_client, [(url, tool, arguments, calls, barrier)] * clients)
+    elapsed = max(end for _, end in spans) - min(start for start, _ in spans)
+    return clients * calls / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    url = f"http://127.0.0.1:{args.port}/mcp"
+    env = dict(os.environ, HOME_EVENT_JOURNAL_DIR="", HOME_SNAPSHOT_INTERVAL="0", HOME_THERMAL_TICK="0")
+
+    print(f"{os.cpu_count()} CPU core(s), {args.clients} clients x {args.calls} calls")
+    print(f"{'workers':>7} | {'list_devices/s':>14} | {'control_light/s':>15}")
+    for workers in args.workers:
+        server = subprocess.Popen(
+            [sys.executable, SERVER, "--transport", "streamable-http", "--port", str(args.port), "--workers", str(workers)],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            wait_until_up(url, server)
+            reads = measure(url, "list_devices", {"format": "json"}, args.clients, args.calls)
+            writes = measure(url, "control_light", {"action": "toggle"}, args.clients, args.calls)
+            print(f"{workers:>7} | {reads:>14,.0f} | {writes:>15,.0f}")
+        finally:
+            server.terminate()
+            server.wait(10)
+
+
+if __name__ == "__main__":
+    main()